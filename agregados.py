@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from flags import FLAG_VALIDO
+from qualidade import PARAMETROS
+
+# 🔺 Níveis da pirâmide de agregados (nome -> frequência do pandas)
+RESOLUCOES = {"1h": "h", "1d": "D"}
+
+# Maior janela (em dias) atendida por cada resolução; None = dados brutos de 1 minuto
+LIMITES_RESOLUCAO = [(31, None), (92, "1h"), (None, "1d")]
+
+ESTATISTICAS = ["media", "min", "max", "validos"]
+
+
+def resolucao_para(dias):
+    """Resolução mais grossa suficiente para exibir uma janela de `dias` dias."""
+    for limite, resolucao in LIMITES_RESOLUCAO:
+        if limite is None or dias <= limite:
+            return resolucao
+
+
+def agregar_horario(df, parametros=PARAMETROS):
+    """
+    Agrega os dados de 1 minuto em médias horárias (apenas amostras válidas).
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação no formato de `ingestao.ler_planilha`.
+    - parametros (list): Parâmetros agregados.
+
+    Retorna:
+    - DataFrame indexado pela hora com {p}_media, {p}_min, {p}_max, {p}_validos
+      para cada parâmetro e o total de amostras da hora ("amostras").
+    """
+    chave = df.index.floor(RESOLUCOES["1h"])
+    flags = df[[p + "flag" for p in parametros]].to_numpy()
+    validos = df[parametros].where(flags == FLAG_VALIDO)
+
+    grupos = validos.groupby(chave)
+    estatisticas = {"media": grupos.mean(), "min": grupos.min(), "max": grupos.max(), "validos": grupos.count()}
+
+    horario = pd.DataFrame({f"{p}_{estat}": estatisticas[estat][p] for p in parametros for estat in ESTATISTICAS})
+    horario["amostras"] = grupos.size()
+    horario.index.name = "date"
+    return horario
+
+
+def agregar_diario(horario, parametros=PARAMETROS):
+    """
+    Agrega as médias horárias em médias diárias, ponderadas pelo número de amostras válidas.
+
+    Parâmetros:
+    - horario (DataFrame): Saída de `agregar_horario`.
+    - parametros (list): Parâmetros agregados.
+
+    Retorna:
+    - DataFrame indexado pelo dia com as mesmas colunas de `agregar_horario`.
+    """
+    chave = horario.index.floor(RESOLUCOES["1d"])
+    medias = horario[[p + "_media" for p in parametros]].to_numpy()
+    contagens = horario[[p + "_validos" for p in parametros]].to_numpy()
+
+    # Soma ponderada por grupo para reconstruir a média diária exata
+    somas = pd.DataFrame(np.nan_to_num(medias) * contagens, index=horario.index, columns=parametros)
+    grupos_soma = somas.groupby(chave).sum()
+    grupos = horario.groupby(chave)
+    validos = grupos[[p + "_validos" for p in parametros]].sum()
+
+    diario = pd.DataFrame(index=validos.index)
+    for p in parametros:
+        n = validos[p + "_validos"]
+        diario[p + "_media"] = (grupos_soma[p] / n).where(n > 0)
+        diario[p + "_min"] = grupos[p + "_min"].min()
+        diario[p + "_max"] = grupos[p + "_max"].max()
+        diario[p + "_validos"] = n
+    diario["amostras"] = grupos["amostras"].sum()
+    diario.index.name = "date"
+    return diario
+
+
+def agregar(df, resolucao, parametros=PARAMETROS):
+    """Calcula diretamente o nível `resolucao` ("1h" ou "1d") a partir dos dados brutos."""
+    horario = agregar_horario(df, parametros)
+    return horario if resolucao == "1h" else agregar_diario(horario, parametros)
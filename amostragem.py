@@ -0,0 +1,51 @@
+import numpy as np
+
+# 🎯 Número padrão de pontos enviados ao navegador por série
+PONTOS_PADRAO = 2000
+
+
+def reduzir_minmax(x, y, n_pontos=PONTOS_PADRAO):
+    """
+    Reduz uma série para cerca de `n_pontos` pontos mantendo picos e falhas.
+
+    A série é dividida em blocos de tamanho igual e, de cada bloco, são mantidos
+    o mínimo e o máximo (na ordem temporal). Blocos com falhas (NaN) mantêm um
+    ponto NaN na posição da primeira falha, para que a linha continue interrompida.
+
+    Parâmetros:
+    - x (array-like): Eixo X (ex.: DatetimeIndex).
+    - y (array-like): Valores, com NaN nas falhas.
+    - n_pontos (int): Quantidade aproximada de pontos desejada.
+
+    Retorna:
+    - Tupla (x, y) reduzida; a série original se já for menor que `n_pontos`.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    blocos = max(n_pontos // 2, 1)
+    if n <= n_pontos:
+        return x, y
+
+    tamanho = -(-n // blocos)
+    blocos = -(-n // tamanho)
+    matriz = np.full(blocos * tamanho, np.nan)
+    matriz[:n] = y
+    matriz = matriz.reshape(blocos, tamanho)
+    falhas = np.isnan(matriz)
+    falhas.reshape(-1)[n:] = False  # O preenchimento do último bloco não é falha
+
+    base = np.arange(blocos) * tamanho
+    pos_min = base + np.argmin(np.nan_to_num(matriz, nan=np.inf), axis=1)
+    pos_max = base + np.argmax(np.nan_to_num(matriz, nan=-np.inf), axis=1)
+    pos_falha = np.where(falhas.any(axis=1), base + np.argmax(falhas, axis=1), -1)
+
+    # Blocos sem nenhum valor válido mantêm apenas o ponto de falha
+    vazios = np.isnan(matriz).all(axis=1)
+    pos_min[vazios] = -1
+    pos_max[vazios] = -1
+
+    posicoes = np.sort(np.stack([pos_min, pos_max, pos_falha], axis=1), axis=1).ravel()
+    posicoes = posicoes[posicoes >= 0]
+    posicoes = posicoes[np.r_[True, np.diff(posicoes) != 0]]
+
+    return x[posicoes], y[posicoes]
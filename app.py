@@ -1,195 +1,250 @@
+import json
+import os
+import urllib.error
+
 import pandas as pd
-import numpy as np
 import streamlit as st
-import altair as at
-from graficos_static import plotar_grafico
-from graficos_dynamic import plotar_grafico_dynamic  # Importando a função do arquivo graficos.py
+from agregados import agregar, resolucao_para
+from cobertura import cobertura
+from conama import mensagens_captura, mensagens_limites, verificar_limites
+from consistencia_nox import avaliar_consistencia_nox
+from atualizacao import INTERVALO_VERIFICACAO, ServicoAtualizacao
+from ingestao import carregar_agregados, carregar_indice_flags
+from instrumentacao import etapa, finalizar_coleta, iniciar_coleta
+from modelo_relatorio import montar_modelo, renderizar
+from qualidade import avaliar_regras, filtrar_por_flags, formatar_ocorrencias
 
 # Ajustando a largura da página para exibir mais informações
 st.set_page_config(layout="wide")
 
-# 📂 Carregar dados do Excel
-file_path = "./datasets/COCA-DADOS.xlsx"
-df = pd.read_excel(file_path, engine="openpyxl", sheet_name="COCA")
-
-# 🎯 Selecionar apenas as colunas necessárias
-df = df[["Date_Time", "NO", "Status_NO", "NO2", "Status_NO2", "NOX", "Status_NOX",
-         "O3", "Status_O3", "CO", "Status_CO", "SO2", "Status_SO2", "PM10", "Status_PM10"]]
-
-# 🏷️ Renomear colunas
-df.columns = ["date", "NO", "NOflag", "NO2", "NO2flag", "NOX", "NOXflag", "O3", "O3flag",
-              "CO", "COflag", "SO2", "SO2flag", "PM10", "PM10flag"]
-
-df["date"] = pd.to_datetime(df["date"])  # Converte a coluna para datetime
-#df.set_index("date", inplace=True)  # Define a coluna como índice
-df.sort_values("date", inplace=True)
-df.set_index("date", inplace=True)
-
-ultima_data = df.index.max()
-
-
-# 🖥️ Criando colunas para organizar layout (Cabeçalho à esquerda, filtro de dias à direita)
-col1, col2 = st.columns([3, 1])
-
-# 🎚️ Filtro de dias na coluna da direita
-with col2:
+# 🛠️ Painel de depuração oculto: ?debug=1 mostra o tempo de cada etapa; ?debug=perfil inclui cProfile e memória
+modo_debug = st.query_params.get("debug")
+
+# 💾 Cache compartilhado entre sessões, chaveado pela versão da planilha.
+# Os objetos retornados são compartilhados (sem cópia) e devem ser tratados como somente leitura.
+@st.cache_resource(show_spinner=False)
+def servico_atualizacao(file_path, sheet_name):
+    # Um único serviço por servidor: a planilha é vigiada e reingerida em segundo plano
+    return ServicoAtualizacao(file_path, sheet_name, intervalo=INTERVALO_VERIFICACAO).iniciar()
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def carregar_agregados_cache(file_path, sheet_name, versao, resolucao, _df):
+    agregado = carregar_agregados(resolucao, file_path, sheet_name=sheet_name)
+    return agregado if agregado is not None else agregar(_df, resolucao)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def indice_flags_cache(file_path, sheet_name, versao, _df):
+    return carregar_indice_flags(_df, file_path, sheet_name=sheet_name)
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def analisar_janela(versao, days_input, _df, _indice):
+    """Filtros, verificação CONAMA e ocorrências de uma janela de `days_input` dias (LRU por versão e janela)."""
+    start_date = _df.index.max() - pd.Timedelta(days=days_input)
+    df_filtered = _df[_df.index >= start_date]
+
+    # 🎯 Filtrando apenas dados válidos
+    valid_data = filtrar_por_flags(df_filtered, [1])
+
+    # ⚠️ Criando outro filtro para dados válidos e inválidos
+    valid_invld_data = filtrar_por_flags(df_filtered, [1, 4])
+
+    # 📶 Cobertura de dados por condição de flag (índice horário/diário, sem varrer os minutos)
+    horario, diario = _indice
+    tabela_cobertura = cobertura(horario, diario, start_date, _df.index.max(), df=_df)
+
+    # ⚠️ Verifica ultrapassagem de limites (médias móveis CONAMA) e a captura mínima de dados
+    limites_resultado = verificar_limites(valid_data, start_date, cobertura=tabela_cobertura)
+
+    # ⚗️ Consistência NO2 = NOX - NO (totais, episódios e taxa horária), também usada nas ocorrências
+    consistencia_nox = avaliar_consistencia_nox(valid_data)
+
+    return {
+        "start_date": start_date,
+        "valid_data": valid_data,
+        "valid_invld_data": valid_invld_data,
+        "limites_resultado": limites_resultado,
+        "cobertura": tabela_cobertura,
+        "exceeded_messages": mensagens_limites(limites_resultado, prefixo="🚨 ")
+                             + mensagens_captura(limites_resultado, prefixo="📶 "),
+        # ⚠️ Verificação de valores negativos e outras anomalias (agrupadas em episódios)
+        "messages_OC": formatar_ocorrencias(avaliar_regras(valid_data, consistencia=consistencia_nox), prefixo="⚠️ "),
+        "consistencia_nox": consistencia_nox,
+    }
+
+
+coleta = iniciar_coleta(ativa=bool(modo_debug), perfil=modo_debug == "perfil", memoria=modo_debug == "perfil")
+# A coleta é encerrada mesmo quando a execução é interrompida (st.rerun, exceções): o cProfile e o
+# tracemalloc são globais ao processo e não podem ficar ligados para a próxima sessão
+metricas = None
+try:
+    # 📂 Dados do Excel publicados pelo serviço de atualização (via cache colunar)
+    file_path = "./datasets/COCA-DADOS.xlsx"
+    servico = servico_atualizacao(file_path, "COCA")
+    with st.spinner("Carregando dados..."), etapa("dados"):
+        instantaneo = servico.aguardar()  # Só bloqueia até a primeira carga do servidor
+    versao = instantaneo.versao
+    df = instantaneo.df
+
+    ultima_data = df.index.max()
+
+
+    # 🖥️ Criando colunas para organizar layout (Cabeçalho à esquerda, filtro de dias à direita)
+    col1, col2 = st.columns([3, 1])
+
+    # 🎚️ Filtro de dias na coluna da direita
+    with col2:
+        st.markdown("""
+            <div style="text-align: right; font-size: 16px; margin-bottom: 5px;">
+                ⏳ <b>Filtro de dias:</b>
+            </div>
+        """, unsafe_allow_html=True)
+
+        # Aplicando CSS para reduzir a largura e alinhar corretamente
+        st.markdown("""
+            <style>
+                div[data-baseweb="input"] {
+                    width: 90px !important;  /* Ajuste o tamanho conforme necessário */
+                    margin-left: auto !important; /* Mantém alinhado à direita */
+                    display: block !important;
+                }
+            </style>
+        """, unsafe_allow_html=True)
+
+        days_input = st.number_input("", min_value=1, max_value=365, value=2, step=1, label_visibility="collapsed")
+
+        # 🔄 Recarrega a página quando o serviço publicar dados novos
+        atualizacao_automatica = st.toggle("🔄 Atualização automática", value=False)
+
+        # 📄 Relatório PDF sob demanda, gerado pelo serviço de relatórios (servico_relatorios.py)
+        if st.button("📄 Gerar relatório"):
+            from servico_relatorios import solicitar_relatorio
+            try:
+                with st.spinner("Gerando relatório..."):
+                    relatorio = solicitar_relatorio({"estacao": "Qt - BOM RETIRO (Fazenda)", "arquivo": os.path.abspath(file_path),
+                                                     "aba": "COCA", "dias": int(days_input)})
+                with open(relatorio["pdf"], "rb") as f:
+                    st.download_button("⬇️ Baixar PDF", f.read(), file_name="relatorio.pdf", mime="application/pdf")
+            except urllib.error.HTTPError as erro:
+                # O serviço respondeu, mas recusou o pedido ou falhou ao gerar: exibe a mensagem devolvida por ele
+                try:
+                    mensagem = json.load(erro).get("erro", erro.reason)
+                except ValueError:
+                    mensagem = erro.reason
+                st.error(f"Falha ao gerar o relatório (HTTP {erro.code}): {mensagem}")
+            except OSError as erro:
+                st.error(f"Serviço de relatórios indisponível ({erro}). Inicie-o com `python servico_relatorios.py`.")
+
+
+    @st.fragment(run_every=INTERVALO_VERIFICACAO if atualizacao_automatica else None)
+    def verificar_dados_novos(versao_exibida):
+        if servico.ultimo().versao != versao_exibida:
+            st.rerun()
+
+
+    verificar_dados_novos(versao)
+
+    # 📅 Filtrando dados pelo intervalo selecionado
+    with etapa("analise"):
+        analise = analisar_janela(versao, days_input, df, indice_flags_cache(file_path, "COCA", versao, df))
+    start_date = analise["start_date"]
+
+
+    # 🧱 Modelo do relatório (o mesmo usado pelo HTML/PDF em gerar_relatorio.py)
+    modelo = montar_modelo("Qt - BOM RETIRO (Fazenda)", df.index.max(), start_date,
+                           analise["exceeded_messages"], analise["messages_OC"])
+
+    with col1:
+        st.markdown(renderizar("cabecalho_app.html", modelo), unsafe_allow_html=True)
+
+    exceeded_messages = modelo["conama"]
+    messages_OC = modelo["ocorrencias"]
+
+    # 📊 Mensagens sobre limites ultrapassados
     st.markdown("""
-        <div style="text-align: right; font-size: 16px; margin-bottom: 5px;">
-            ⏳ <b>Filtro de dias:</b>
+        <div style= padding: 5px; border-radius: 5px; margin-bottom: -10px; ">
+            <b>📊 Padrão de QAr (CONAMA 506/2024):</b>
         </div>
     """, unsafe_allow_html=True)
+    if exceeded_messages:
+        for msg in exceeded_messages:
+            st.markdown(f"<div style='background-color: #ffdddd; padding: 3px; border-radius: 5px;'>{msg}</div>", unsafe_allow_html=True)
+    else:
+        st.markdown("<div style='background-color: #ddffdd; padding: 3px; border-radius: 5px;'>Nenhum limite foi ultrapassado.</div>", unsafe_allow_html=True)
 
-    # Aplicando CSS para reduzir a largura e alinhar corretamente
+    # 📋 Mensagens sobre invalidações
     st.markdown("""
-        <style>
-            div[data-baseweb="input"] {
-                width: 90px !important;  /* Ajuste o tamanho conforme necessário */
-                margin-left: auto !important; /* Mantém alinhado à direita */
-                display: block !important;
-            }
-        </style>
-    """, unsafe_allow_html=True)
-
-    days_input = st.number_input("", min_value=1, max_value=365, value=2, step=1, label_visibility="collapsed")
-
-# 📅 Filtrando dados pelo intervalo selecionado
-start_date = df.index.max() - pd.Timedelta(days=days_input)
-
-
-with col1:
-    st.markdown("""
-        <div style="
-            font-size: 24px; font-weight: bold; text-align: left;
-            padding-bottom: 5px;">
-            📋 INFORME DIÁRIO - {date}
-        </div>
-        <div style="font-size: 18px; color: #0072B5; text-align: left;">
-            Ref.: {start_date} a {end_date}
+        <div style= padding: 5px; border-radius: 5px; margin-bottom: -10px;">
+            <b>📋 Feedback de Ocorrências:</b>
         </div>
-        <div style="font-size: 16px; font-weight: bold; text-align: left;">
-            🚩 ESTAÇÃO Qt - BOM RETIRO (Fazenda)
-        </div>
-    """.format(
-        date=df.index.max().strftime('%d/%m/%Y'),
-        start_date=start_date.strftime('%d/%m/%Y'),
-        end_date=df.index.max().strftime('%d/%m/%Y')
-    ), unsafe_allow_html=True)
-
-
-df_filtered = df[df.index >= start_date]
-
-# 🎯 Filtrando apenas dados válidos
-valid_data = df_filtered[
-    (df_filtered["NOflag"] == 1) & (df_filtered["NO2flag"] == 1) & (df_filtered["NOXflag"] == 1) &
-    (df_filtered["O3flag"] == 1) & (df_filtered["COflag"] == 1) &
-    (df_filtered["SO2flag"] == 1) & (df_filtered["PM10flag"] == 1)
-].copy()
-
-# ⚠️ Criando outro filtro para dados válidos e inválidos
-valid_invld_data = df_filtered[
-    ((df_filtered["NOflag"] == 1) | (df_filtered["NOflag"] == 4)) &
-    ((df_filtered["NO2flag"] == 1) | (df_filtered["NO2flag"] == 4)) &
-    ((df_filtered["NOXflag"] == 1) | (df_filtered["NOXflag"] == 4)) &
-    ((df_filtered["O3flag"] == 1) | (df_filtered["O3flag"] == 4)) &
-    ((df_filtered["COflag"] == 1) | (df_filtered["COflag"] == 4)) &
-    ((df_filtered["SO2flag"] == 1) | (df_filtered["SO2flag"] == 4)) &
-    ((df_filtered["PM10flag"] == 1) | (df_filtered["PM10flag"] == 4))
-].copy()
-
-# 📊 Definição dos limites da CONAMA
-limits = {
-    "NO2": 250,
-    "O3": 130,
-    "CO": 9,
-    "SO2": 50,
-    "PM10": 100,
-}
-
-# 🔄 Função para calcular médias móveis
-def rolling_mean(series, window, min_periods):
-    return series.rolling(window, min_periods=min_periods).mean()
-
-# 📈 Cálculo das médias móveis
-NO2_hourly_MA = rolling_mean(valid_data["NO2"], "1h", 1)
-O3_hourly_MA = rolling_mean(valid_data["O3"], "8h", 6)
-CO_hourly_MA = rolling_mean(valid_data["CO"], "8h", 6)
-SO2_hourly_MA = rolling_mean(valid_data["SO2"], "24h", 18)
-PM10_hourly_MA = rolling_mean(valid_data["PM10"], "24h", 18)
-
-# ⚠️ Verifica ultrapassagem de limites
-exceeded_messages = []
-for param, limit in limits.items():
-    exceeded = eval(f"{param}_hourly_MA") > limit
-    exceeded = exceeded[exceeded.index >= start_date]
-
-    if exceeded.any():
-        max_val = eval(f"{param}_hourly_MA").max()
-        max_time = eval(f"{param}_hourly_MA").idxmax().strftime("%d/%m/%y %H:%M")
-        exceeded_messages.append(f"🚨 {param} ultrapassou {limit} µg/m³ ({max_val:.2f}) em {max_time}")
-
-# ⚠️ Verificação de valores negativos e outras anomalias
-messages_OC = []
-
-for param in ["NO", "NO2", "NOX", "O3", "CO", "SO2"]:
-    negative_values = valid_data[valid_data[param] < 0]
-    for index, row in negative_values.iterrows():
-        messages_OC.append(f"⚠️ {param} abaixo de 0 em {index.strftime('%d/%m/%y %H:%M')}")
-
-for param in ["PM10"]:
-    negative_values = valid_data[valid_data[param] < -2]
-    for index, row in negative_values.iterrows():
-        messages_OC.append(f"⚠️ {param} abaixo de -2 em {index.strftime('%d/%m/%y %H:%M')}")
-
-# Condição NO2 fora da margem de 10%
-valid_data['expected_NO2'] = valid_data['NOX'] - valid_data['NO']
-valid_data['NO2_margin'] = valid_data['expected_NO2'] * 0.1
-valid_data['is_outside_margin'] = ((valid_data["NO2"] < (valid_data['expected_NO2'] - valid_data['NO2_margin'])) |
-                                   (valid_data["NO2"] > (valid_data['expected_NO2'] + valid_data['NO2_margin'])))
-
-for date, row in valid_data[valid_data["is_outside_margin"]].iterrows():
-    messages_OC.append(f"⚠️ NO2 fora da margem de 10% no dia {date.strftime('%d/%m/%y %H:%M')}")
-
-
-# 📊 Mensagens sobre limites ultrapassados
-st.markdown("""
-    <div style= padding: 5px; border-radius: 5px; margin-bottom: -10px; ">
-        <b>📊 Padrão de QAr (CONAMA 506/2024):</b>
-    </div>
-""", unsafe_allow_html=True)
-if exceeded_messages:
-    for msg in exceeded_messages:
-        st.markdown(f"<div style='background-color: #ffdddd; padding: 3px; border-radius: 5px;'>{msg}</div>", unsafe_allow_html=True)
-else:
-    st.markdown("<div style='background-color: #ddffdd; padding: 3px; border-radius: 5px;'>Nenhum limite foi ultrapassado.</div>", unsafe_allow_html=True)
-
-# 📋 Mensagens sobre invalidações
-st.markdown("""
-    <div style= padding: 5px; border-radius: 5px; margin-bottom: -10px;">
-        <b>📋 Feedback de Ocorrências:</b>
-    </div>
-""", unsafe_allow_html=True)
-if messages_OC:
-    for msg in messages_OC:
-        st.markdown(f"<div style='background-color: #ffcccc; padding: 2px; border-radius: 1px;'>{msg}</div>", unsafe_allow_html=True)
-else:
-    st.markdown("<div style='background-color: #ddffdd; padding: 3px; border-radius: 1px;'>Nenhuma ocorrência a relatar.</div>", unsafe_allow_html=True)
-
-st.markdown("")
-
-params = ["NO","NO2"]
-cols = st.columns(len(params))
-# Criando o estado da aplicação para alternar gráficos
-if "use_flag_graphs" not in st.session_state:
-    st.session_state.use_flag_graphs = False
-
-if st.session_state.use_flag_graphs:
-    for i, param in enumerate(params):
-        plotar_grafico(param, df, cols[i])
-    button_label = "Gráficos Dinâmicos"
-else:
-    for i, param in enumerate(params):
-        plotar_grafico_dynamic(param, df, cols[i])
-    button_label = "Gráficos de Flag"
+    """, unsafe_allow_html=True)
+    if messages_OC:
+        for msg in messages_OC:
+            st.markdown(f"<div style='background-color: #ffcccc; padding: 2px; border-radius: 1px;'>{msg}</div>", unsafe_allow_html=True)
+    else:
+        st.markdown("<div style='background-color: #ddffdd; padding: 3px; border-radius: 1px;'>Nenhuma ocorrência a relatar.</div>", unsafe_allow_html=True)
+
+    # ⚗️ Resumo da consistência NO2 = NOX - NO no período
+    nox = analise["consistencia_nox"]
+    if nox["violacoes"]:
+        pior_hora = nox["taxa_horaria"]["taxa_pct"].idxmax()
+        st.caption(f"⚗️ NO2 × (NOX - NO): {100 * nox['violacoes'] / nox['avaliadas']:.1f}% das amostras fora da margem "
+                   f"em {len(nox['episodios'])} episódio(s); pior hora: {pior_hora.strftime('%d/%m %H:00')} "
+                   f"({nox['taxa_horaria'].loc[pior_hora, 'taxa_pct']:.0f}%)")
+
+    # 📶 Cobertura de dados do período (% das amostras esperadas em cada condição de flag)
+    with st.expander("📶 Cobertura de dados"):
+        st.dataframe(analise["cobertura"].drop(columns="esperadas").style.format("{:.1f}%"))
+
+    st.markdown("")
+
+    params = ["NO","NO2"]
+    cols = st.columns(len(params))
+    # Criando o estado da aplicação para alternar gráficos
+    if "use_flag_graphs" not in st.session_state:
+        st.session_state.use_flag_graphs = False
+
+    # Os módulos de gráficos (matplotlib / plotly) são importados apenas no modo em uso
+    if st.session_state.use_flag_graphs:
+        from graficos_static import plotar_grafico
+        for i, param in enumerate(params):
+            plotar_grafico(param, df, cols[i])
+        button_label = "Gráficos Dinâmicos"
+    else:
+        from graficos_dynamic import plotar_grafico_dynamic
+
+        dias_grafico = max(30, days_input)
+
+        # 🔍 Período visível: ao aproximar, os dados são buscados novamente com mais detalhe
+        inicio_grafico = (ultima_data - pd.Timedelta(days=dias_grafico)).to_pydatetime()
+        intervalo = st.slider("🔍 Período visível", min_value=inicio_grafico, max_value=ultima_data.to_pydatetime(),
+                              value=(inicio_grafico, ultima_data.to_pydatetime()), step=pd.Timedelta(hours=1).to_pytimedelta(),
+                              format="DD/MM/YY HH:mm")
+        intervalo = (pd.Timestamp(intervalo[0]), pd.Timestamp(intervalo[1]))
+
+        # 🔺 Janelas longas são lidas da pirâmide de agregados (1 h ou 1 dia) em vez dos dados brutos
+        resolucao = resolucao_para((intervalo[1] - intervalo[0]) / pd.Timedelta(days=1))
+        agregado = None
+        if resolucao is not None:
+            with etapa("agregados"):
+                agregado = carregar_agregados_cache(file_path, "COCA", versao, resolucao, df)
+        for i, param in enumerate(params):
+            plotar_grafico_dynamic(param, df, cols[i], dias=dias_grafico, agregado=agregado, intervalo=intervalo)
+        button_label = "Gráficos de Flag"
+finally:
+    if coleta is not None:
+        metricas = finalizar_coleta(coleta)
+
+
+# 🛠️ Métricas desta execução (somente com ?debug=...)
+if metricas is not None:
+    with st.expander("🛠️ Depuração", expanded=True):
+        st.caption(f"Execução: {metricas['total_s']:.3f}s · versão dos dados {versao}")
+        st.dataframe(pd.DataFrame(metricas["etapas"]), hide_index=True)
+        if metricas["perfil"]:
+            st.code(metricas["perfil"], language=None)
 
 # Botão para alternar gráficos
 if st.button(button_label):
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import namedtuple
+
+from ingestao import FILE_PATH, SHEET_NAME, carregar_dados, versao_dados
+
+# ⏱️ Intervalo (s) entre verificações da planilha
+INTERVALO_VERIFICACAO = 30
+
+# 📸 Instantâneo publicado a cada ingestão (imutável; o DataFrame deve ser tratado como somente leitura)
+Instantaneo = namedtuple("Instantaneo", ["versao", "df", "atualizado_em"])
+
+
+class ServicoAtualizacao:
+    """
+    Serviço em segundo plano que mantém os dados da estação atualizados.
+
+    Uma thread verifica periodicamente a assinatura da planilha (tamanho e
+    mtime). Quando ela muda, os dados são reingeridos pelo store incremental
+    (`ingestao.carregar_dados`) e um novo `Instantaneo` é publicado. As
+    sessões apenas leem o último instantâneo, sem bloquear nem reler a planilha.
+
+    Parâmetros:
+    - file_path (str): Caminho do arquivo Excel.
+    - sheet_name (str): Nome da aba com os dados.
+    - intervalo (float): Intervalo entre verificações, em segundos.
+    """
+
+    def __init__(self, file_path=FILE_PATH, sheet_name=SHEET_NAME, intervalo=INTERVALO_VERIFICACAO):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.intervalo = intervalo
+        self.ultimo_erro = None
+        self._instantaneo = None
+        self._primeira_tentativa = threading.Event()  # Permanece ativo após a primeira carga (ou falha)
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Inicia a thread de atualização (idempotente)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="atualizacao-dados", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        """Sinaliza o fim da thread e aguarda até `timeout` segundos."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def ultimo(self):
+        """Último instantâneo publicado (None se a primeira carga ainda não terminou)."""
+        return self._instantaneo
+
+    def aguardar(self, timeout=None):
+        """
+        Retorna o último instantâneo, aguardando a primeira tentativa de carga se necessário.
+
+        Levanta o último erro de ingestão se nenhum instantâneo existir ao fim da espera.
+        """
+        self._primeira_tentativa.wait(timeout)
+        if self._instantaneo is None:
+            raise self.ultimo_erro or TimeoutError("Dados ainda não carregados")
+        return self._instantaneo
+
+    def verificar(self):
+        """
+        Verifica a planilha uma vez e publica um novo instantâneo se ela mudou.
+
+        Retorna:
+        - True se um novo instantâneo foi publicado.
+        """
+        versao = versao_dados(self.file_path)
+        if self._instantaneo is not None and self._instantaneo.versao == versao:
+            return False
+
+        df = carregar_dados(self.file_path, sheet_name=self.sheet_name, compacto=True)
+        # Publicação atômica: as sessões veem o instantâneo antigo ou o novo, nunca um parcial
+        self._instantaneo = Instantaneo(versao, df, time.time())
+        self._primeira_tentativa.set()
+        return True
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.verificar()
+                self.ultimo_erro = None
+            except Exception as erro:  # Planilha em gravação, removida etc.: mantém o instantâneo anterior
+                self.ultimo_erro = erro
+                # Libera quem aguarda a primeira carga (inclusive quem chegar depois) para que o erro seja propagado
+                self._primeira_tentativa.set()
+            self._parar.wait(self.intervalo)
@@ -0,0 +1,61 @@
+"""
+Benchmark da decodificação de flags usada pelos gráficos.
+
+Compara, por parâmetro, a implementação antiga (`apply` por condição e
+`apply(axis=1)` para mascarar inválidos) com o que os gráficos usam hoje:
+`flags.valores_validos` e os intervalos de `flags.intervalos_flags`.
+
+Uso:
+    python benchmarks/bench_flags.py [--dias 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dados_sinteticos import gerar_estacao  # noqa: E402
+from flags import CONDICOES_FLAG, intervalos_flags, valores_validos  # noqa: E402
+
+PARAMS = ["NO", "NO2", "NOX", "O3", "CO", "SO2", "PM10"]
+
+
+def decodificar_antigo(parametro, df):
+    df = df.copy()
+    flag_column = parametro + "flag"
+    for condition, flag_value in CONDICOES_FLAG.items():
+        df[condition] = df[flag_column].apply(lambda x: 999 if x == flag_value else 0)
+    df[parametro] = df.apply(lambda x: x[parametro] if x[flag_column] == 1 else None, axis=1)
+    return df
+
+
+def decodificar_novo(parametro, df):
+    flags = df[parametro + "flag"].to_numpy()
+    return valores_validos(df[parametro], flags), intervalos_flags(df.index, flags)
+
+
+def cronometrar(funcao, *args, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=30, help="Dias de dados de 1 minuto por parâmetro")
+    args = parser.parse_args()
+
+    df = gerar_estacao(args.dias)
+    print(f"{len(df)} amostras por parâmetro ({args.dias} dias)")
+    print(f"{'parâmetro':<10}{'antes (s)':>12}{'depois (s)':>12}{'ganho':>10}")
+    for param in PARAMS:
+        antes = cronometrar(decodificar_antigo, param, df, repeticoes=1)
+        depois = cronometrar(decodificar_novo, param, df)
+        print(f"{param:<10}{antes:>12.4f}{depois:>12.4f}{antes / depois:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
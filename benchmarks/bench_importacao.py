@@ -0,0 +1,84 @@
+"""
+Tempo de importação (partida a frio) dos pontos de entrada do projeto.
+
+Executa, em um processo novo com `python -X importtime`, as importações de
+nível de módulo de app.py e gerar_relatorio.py (sem rodar o restante do
+script) e resume o tempo total de importação e quais bibliotecas pesadas
+foram carregadas.
+
+Para comparar versões, aponte --raiz para outra cópia do repositório
+(ex.: `git worktree add /tmp/base <commit>`).
+
+Uso:
+    python benchmarks/bench_importacao.py [--raiz .] [--repeticoes 5]
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+# Pontos de entrada medidos
+ENTRADAS = ["app.py", "gerar_relatorio.py"]
+
+# Bibliotecas cujo carregamento é relatado
+BIBLIOTECAS_PESADAS = ["streamlit", "matplotlib", "plotly", "altair", "weasyprint", "pyarrow", "pandas", "jinja2"]
+
+
+def importacoes_de_modulo(arquivo):
+    """Código-fonte com apenas as instruções import de nível de módulo de `arquivo`."""
+    with open(arquivo, encoding="utf-8") as f:
+        arvore = ast.parse(f.read(), arquivo)
+    nos = [no for no in arvore.body if isinstance(no, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=nos, type_ignores=[]))
+
+
+def medir(codigo, raiz):
+    """
+    Executa `codigo` com -X importtime em um processo novo.
+
+    Retorna:
+    - Tupla (tempo total de importação em ms, conjunto de módulos de topo importados).
+    """
+    ambiente = {**os.environ, "PYTHONPATH": raiz}
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=raiz, env=ambiente,
+                              capture_output=True, text=True, check=True)
+    total_us = 0
+    modulos = set()
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, _, nome = linha[len("import time:"):].split("|")
+        total_us += int(proprio)
+        modulos.add(nome.strip().split(".")[0])
+    return total_us / 1000, modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raiz", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="Pasta do repositório medido")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções por ponto de entrada (vale a mediana)")
+    args = parser.parse_args()
+    raiz = os.path.abspath(args.raiz)
+
+    for entrada in ENTRADAS:
+        codigo = importacoes_de_modulo(os.path.join(raiz, entrada))
+        try:
+            medir(codigo, raiz)  # Aquecimento: gera os .pyc e carrega o cache de disco
+        except subprocess.CalledProcessError as erro:
+            ultima_linha = erro.stderr.strip().splitlines()[-1]
+            print(f"{entrada:<20}{'falhou':>13}   {ultima_linha}")
+            continue
+        tempos = []
+        for _ in range(args.repeticoes):
+            tempo, modulos = medir(codigo, raiz)
+            tempos.append(tempo)
+
+        carregadas = [b for b in BIBLIOTECAS_PESADAS if b in modulos]
+        print(f"{entrada:<20}{statistics.median(tempos):>10.0f} ms   {', '.join(carregadas)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Pico de memória e tempo da ingestão: leitura completa x leitura em blocos.
+
+Grava uma planilha (ou CSV) sintética no formato da estação e compara:
+- "completa": `pd.read_excel` / `pd.read_csv` de todas as colunas, seleção
+  e conversão depois (a leitura original de `ingestao.ler_planilha`);
+- "blocos": `ingestao.ler_blocos` gravando direto no store colunar
+  (`atualizar_store_blocos`), sem montar o DataFrame completo.
+
+O pico de memória é medido com tracemalloc (alocações do Python e do NumPy).
+
+Uso:
+    python benchmarks/bench_ingestao.py [--dias 90] [--formato xlsx|csv] [--linhas-bloco 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dados_sinteticos import gerar_estacao, para_planilha  # noqa: E402
+from ingestao import COLUNAS, COLUNAS_ORIGEM, atualizar_store_blocos, ler_blocos  # noqa: E402
+
+# Colunas extras presentes nas exportações reais e descartadas na leitura
+COLUNAS_EXTRAS = ["WS", "WD", "TEMP", "UR", "PRESS", "RAD", "CHUVA", "Status_WS", "Status_WD"]
+
+
+def leitura_completa(arquivo):
+    if arquivo.endswith(".csv"):
+        df = pd.read_csv(arquivo)
+    else:
+        df = pd.read_excel(arquivo, engine="openpyxl", sheet_name="COCA")
+    df = df[COLUNAS_ORIGEM]
+    df.columns = COLUNAS
+    df["date"] = pd.to_datetime(df["date"])
+    return df.set_index("date")
+
+
+def leitura_blocos(arquivo, store_dir, linhas_bloco):
+    meta = {"particoes": {}}
+    return atualizar_store_blocos(ler_blocos(arquivo, "COCA", linhas_bloco=linhas_bloco), store_dir, meta)
+
+
+def medir(funcao):
+    """Executa `funcao` e retorna (segundos, pico de memória em MiB)."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        funcao()
+        return time.perf_counter() - inicio, tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=90, help="Dias de histórico de 1 minuto")
+    parser.add_argument("--formato", choices=["xlsx", "csv"], default="xlsx", help="Formato do arquivo lido")
+    parser.add_argument("--linhas-bloco", type=int, default=20_000, help="Linhas por bloco na leitura em blocos")
+    args = parser.parse_args()
+
+    df = gerar_estacao(args.dias)
+    with tempfile.TemporaryDirectory(prefix="bench-") as pasta:
+        arquivo = os.path.join(pasta, f"estacao.{args.formato}")
+        planilha = para_planilha(df).assign(**{coluna: 0.0 for coluna in COLUNAS_EXTRAS})
+        if args.formato == "csv":
+            planilha.to_csv(arquivo, index=False)
+        else:
+            planilha.to_excel(arquivo, sheet_name="COCA", index=False)
+
+        print(f"{len(df)} linhas, {os.path.getsize(arquivo) / 2**20:.1f} MiB em disco ({args.formato})")
+        for nome, funcao in [
+            ("completa", lambda: leitura_completa(arquivo)),
+            ("blocos", lambda: leitura_blocos(arquivo, os.path.join(pasta, "store"), args.linhas_bloco)),
+        ]:
+            segundos, pico = medir(funcao)
+            print(f"{nome:<10}{segundos:>10.2f} s{pico:>10.1f} MiB de pico")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Tempo de execução das médias móveis CONAMA.
+
+Para os dados válidos de uma estação sintética (`filtrar_por_flags(df, [1])`,
+com timestamps irregulares), compara o `rolling(janela, min_periods)` do
+pandas (implementação anterior) com `conama.medias_moveis` nas bases
+"amostras" e "horaria", usando o kernel NumPy e, se instalado, o numba.
+A equivalência dos resultados é verificada em tests/test_janelas_moveis.py.
+
+Uso:
+    python benchmarks/bench_medias_moveis.py [--dias 30 365] [--repeticoes 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import janelas_moveis  # noqa: E402
+from conama import JANELAS, medias_moveis  # noqa: E402
+from dados_sinteticos import gerar_estacao  # noqa: E402
+from qualidade import filtrar_por_flags  # noqa: E402
+
+
+def medias_pandas(df, janelas=JANELAS):
+    # Implementação anterior de conama.medias_moveis
+    grupos = {}
+    for param, especificacao in janelas.items():
+        grupos.setdefault(especificacao, []).append(param)
+    partes = [df[params].rolling(janela, min_periods=minimo).mean() for (janela, minimo), params in grupos.items()]
+    return pd.concat(partes, axis=1)[list(janelas)]
+
+
+def cronometrar(funcao, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, nargs="+", default=[30, 365], help="Tamanhos de histórico, em dias")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções por medição (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    numba = janelas_moveis.numba
+    kernels = [("numpy", None)] + ([("numba", numba)] if numba is not None else [])
+    if numba is None:
+        print("numba não instalado: apenas o kernel NumPy é medido")
+
+    for dias in args.dias:
+        validos = filtrar_por_flags(gerar_estacao(dias, seed=dias), [1])
+        print(f"\n{dias} dia(s): {len(validos)} amostras válidas")
+        tempo_pandas = cronometrar(lambda: medias_pandas(validos), args.repeticoes)
+        print(f"  {'pandas rolling (amostras)':<34}{tempo_pandas:>8.3f}s")
+
+        for nome, modulo in kernels:
+            janelas_moveis.numba = modulo
+            try:
+                medias_moveis(validos, base="amostras")  # Compilação do numba fora da medição
+                for base in ("amostras", "horaria"):
+                    tempo = cronometrar(lambda: medias_moveis(validos, base=base), args.repeticoes)
+                    print(f"  {f'{nome} ({base})':<34}{tempo:>8.3f}s   {tempo_pandas / tempo:>6.1f}x")
+            finally:
+                janelas_moveis.numba = numba
+
+
+if __name__ == "__main__":
+    main()
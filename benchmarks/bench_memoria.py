@@ -0,0 +1,47 @@
+"""
+Relatório de memória do esquema compacto dos dados da estação.
+
+Gera históricos sintéticos de 1 minuto no esquema lido da planilha (float64
+em todas as colunas) e compara, por coluna, com `ingestao.compactar`
+(medições em float32 e flags em uint8).
+
+Uso:
+    python benchmarks/bench_memoria.py [--anos 1] [--estacoes 1]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dados_sinteticos import gerar_estacao  # noqa: E402
+from ingestao import compactar, relatorio_memoria  # noqa: E402
+
+
+def gerar_dados(dias, seed=0):
+    # read_excel devolve os flags como float64 quando há células vazias
+    return gerar_estacao(dias, seed=seed).astype(float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anos", type=int, default=1, help="Anos de histórico por estação")
+    parser.add_argument("--estacoes", type=int, default=1, help="Número de estações mantidas em memória")
+    args = parser.parse_args()
+
+    df = gerar_dados(args.anos * 365)
+    relatorio = relatorio_memoria(df, compactar(df))
+
+    print(f"{len(df)} amostras por estação ({args.anos} ano(s))")
+    print(relatorio.to_string(formatters={
+        "bytes_antes": lambda b: f"{b / 2**20:.1f} MiB",
+        "bytes_depois": lambda b: f"{b / 2**20:.1f} MiB",
+        "reducao_pct": lambda p: f"{p:.0f}%",
+    }))
+
+    antes, depois = relatorio.loc["Total", ["bytes_antes", "bytes_depois"]]
+    print(f"\n{args.estacoes} estação(ões): {antes * args.estacoes / 2**20:.0f} MiB -> "
+          f"{depois * args.estacoes / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Pico de memória da preparação dos gráficos de flag em função do tamanho do histórico.
+
+Para históricos sintéticos crescentes, mede com tracemalloc o pico de memória
+alocada ao montar os arrays das figuras de todos os parâmetros:
+- "antes": cópia do DataFrame inteiro por parâmetro e colunas de condição
+  adicionadas à fatia (comportamento anterior de gerar_relatorio.py);
+- "depois": visões somente leitura da janela (`janela.janela_parametro`) e
+  decodificação dos flags apenas na janela exibida.
+
+Com --renderizar, a imagem de cada parâmetro também é gerada (sem cache).
+
+Uso:
+    python benchmarks/bench_memoria_graficos.py [--anos 1 5 10] [--renderizar]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_memoria import gerar_dados  # noqa: E402
+from flags import CONDICOES_FLAG, FLAG_HEIGHT, intervalos_flags, valores_validos  # noqa: E402
+from ingestao import compactar  # noqa: E402
+from janela import janela_parametro  # noqa: E402
+from qualidade import PARAMETROS  # noqa: E402
+
+DIAS_GRAFICO = 30
+
+
+def preparar_antes(df, renderizar):
+    for parametro in PARAMETROS:
+        copia = df.copy()
+        ultima_data = copia.index.max()
+        fatia = copia.loc[ultima_data - pd.Timedelta(days=DIAS_GRAFICO):ultima_data]
+        for condicao, codigo in CONDICOES_FLAG.items():
+            fatia[condicao] = (fatia[parametro + "flag"] == codigo) * FLAG_HEIGHT
+        fatia[parametro] = fatia[parametro].where(fatia[parametro + "flag"] == 1)
+
+
+def preparar_depois(df, renderizar):
+    for parametro in PARAMETROS:
+        index, valores, flags = janela_parametro(df, parametro, dias=DIAS_GRAFICO)
+        if renderizar:
+            from graficos_static import renderizar_grafico_bytes
+            renderizar_grafico_bytes(parametro, index, valores, flags, usar_cache=False)
+        else:
+            valores_validos(valores, flags)
+            intervalos_flags(index, flags)
+
+
+def pico_mib(funcao, df, renderizar):
+    tracemalloc.start()
+    funcao(df, renderizar)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anos", type=int, nargs="+", default=[1, 5, 10], help="Tamanhos de histórico, em anos")
+    parser.add_argument("--renderizar", action="store_true", help="Gerar também as imagens (lento)")
+    args = parser.parse_args()
+
+    print(f"{'histórico':<12}{'dados (MiB)':>14}{'antes (MiB)':>14}{'depois (MiB)':>14}")
+    for anos in args.anos:
+        df = compactar(gerar_dados(anos * 365))
+        dados = df.memory_usage(index=True).sum() / 2**20
+        antes = pico_mib(preparar_antes, df, False)
+        depois = pico_mib(preparar_depois, df, args.renderizar)
+        print(f"{f'{anos} ano(s)':<12}{dados:>14.1f}{antes:>14.1f}{depois:>14.1f}")
+        del df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark das etapas do painel (app.py) e do relatório (gerar_relatorio.py).
+
+Para cada tamanho de histórico (anos de dados sintéticos de 1 minuto, ver
+`dados_sinteticos.py`) mede a ingestão (store colunar e, com --excel, a
+leitura da planilha) e a renderização dos gráficos estáticos; para cada
+janela (dias) mede os filtros de flag, as médias móveis CONAMA, as
+ocorrências, os gráficos interativos, o HTML e, se o WeasyPrint estiver
+disponível, o PDF.
+
+Os resultados (melhor tempo de --repeticoes execuções) são gravados em JSON
+para acompanhar regressões entre versões.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--anos 1 5 10] [--janelas 2 30 365] [--saida bench_pipeline.json]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agregados import resolucao_para  # noqa: E402
+from conama import mensagens_limites, verificar_limites  # noqa: E402
+from dados_sinteticos import gerar_estacao, gravar_planilha  # noqa: E402
+from ingestao import atualizar_store, compactar, ler_planilha, ler_store  # noqa: E402
+from modelo_relatorio import montar_modelo, montar_modelo_graficos, renderizar  # noqa: E402
+from qualidade import PARAMETROS, avaliar_regras, filtrar_por_flags, formatar_ocorrencias  # noqa: E402
+
+# Maior número de linhas de uma planilha Excel (sem o cabeçalho)
+LINHAS_EXCEL = 1_048_575
+
+
+def cronometrar(funcao, repeticoes=1):
+    """Executa `funcao` e retorna (melhor tempo em segundos, último resultado)."""
+    melhor = float("inf")
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+class Coletor:
+    """Acumula os tempos de cada etapa no formato gravado em JSON."""
+
+    def __init__(self, repeticoes):
+        self.repeticoes = repeticoes
+        self.resultados = []
+
+    def medir(self, etapa, funcao, anos, janela=None, repeticoes=None):
+        segundos, resultado = cronometrar(funcao, repeticoes or self.repeticoes)
+        self.resultados.append({"etapa": etapa, "historico_anos": anos, "janela_dias": janela,
+                                "segundos": round(segundos, 6)})
+        print(f"{anos:>4} ano(s) {'' if janela is None else f'{janela:>4} dia(s)':>10}  {etapa:<20}{segundos:>10.4f}s")
+        return resultado
+
+    def ignorar(self, etapa, anos, motivo, janela=None):
+        self.resultados.append({"etapa": etapa, "historico_anos": anos, "janela_dias": janela, "ignorado": motivo})
+        print(f"{anos:>4} ano(s) {'' if janela is None else f'{janela:>4} dia(s)':>10}  {etapa:<20}  ignorado: {motivo}")
+
+
+def _gerador_pdf():
+    # O WeasyPrint depende de bibliotecas do sistema (Pango); sem elas a etapa de PDF é ignorada
+    try:
+        from weasyprint import HTML
+        from gerar_relatorio import _folha_estilo, _url_fetcher
+    except (ImportError, OSError) as erro:
+        return None, f"WeasyPrint indisponível ({type(erro).__name__})"
+
+    def gerar_pdf(html, imagens, formato="png"):
+        return HTML(string=html, url_fetcher=_url_fetcher(imagens, formato)).write_pdf(
+            stylesheets=[_folha_estilo()])
+
+    return gerar_pdf, None
+
+
+def medir_historico(coletor, anos, args, pasta):
+    df = gerar_estacao(anos * 365, seed=anos)
+
+    # 📂 Ingestão
+    if args.excel:
+        if len(df) > LINHAS_EXCEL:
+            coletor.ignorar("excel_ler", anos, f"{len(df)} linhas excedem o limite do Excel")
+        else:
+            planilha = gravar_planilha(df, os.path.join(pasta, f"estacao-{anos}.xlsx"))
+            coletor.medir("excel_ler", lambda: ler_planilha(planilha, "COCA"), anos, repeticoes=1)
+
+    store_dir = os.path.join(pasta, f"store-{anos}")
+    meta = {"particoes": {}}
+    coletor.medir("store_gravar", lambda: atualizar_store(df, store_dir, meta), anos, repeticoes=1)
+    coletor.medir("store_ler", lambda: ler_store(store_dir, meta), anos)
+    dia_novo = gerar_estacao(1, inicio=df.index[-1] + pd.Timedelta(minutes=1), seed=anos + 1000)
+    df_novo = pd.concat([df, dia_novo])
+    coletor.medir("store_incremental", lambda: atualizar_store(df_novo, store_dir, meta), anos, repeticoes=1)
+    df = coletor.medir("compactar", lambda: compactar(df), anos)
+    agregados = {resolucao: ler_store(os.path.join(store_dir, resolucao), meta) for resolucao in ("1h", "1d")}
+
+    # 📊 Gráficos estáticos (janela fixa de 30 dias, sem cache de figuras)
+    from graficos_static import renderizar_grafico_bytes
+    from janela import janela_parametro
+
+    def graficos_estaticos():
+        imagens = {}
+        for param in args.parametros_grafico:
+            index, valores, flags = janela_parametro(df, param, dias=30)
+            imagens[param] = renderizar_grafico_bytes(param, index, valores, flags, usar_cache=False)
+        return imagens
+
+    imagens = coletor.medir("graficos_estaticos", graficos_estaticos, anos, repeticoes=1)
+
+    for janela in args.janelas:
+        medir_janela(coletor, df, agregados, imagens, anos, janela)
+
+
+def medir_janela(coletor, df, agregados, imagens, anos, janela):
+    ultima_data = df.index.max()
+    start_date = ultima_data - pd.Timedelta(days=janela)
+    df_filtered = coletor.medir("janela", lambda: df[df.index >= start_date], anos, janela)
+
+    valid_data = coletor.medir("filtro_flags", lambda: (filtrar_por_flags(df_filtered, [1]),
+                                                        filtrar_por_flags(df_filtered, [1, 4]))[0], anos, janela)
+    exceeded_messages = coletor.medir(
+        "limites_conama", lambda: mensagens_limites(verificar_limites(valid_data, start_date)), anos, janela)
+    messages_OC = coletor.medir(
+        "ocorrencias", lambda: formatar_ocorrencias(avaliar_regras(valid_data)), anos, janela)
+
+    # 📈 Gráficos interativos como no painel: janela mínima de 30 dias e agregados em janelas longas
+    from graficos_dynamic import plotar_grafico_dynamic
+    dias_grafico = max(30, janela)
+    resolucao = resolucao_para(dias_grafico)
+    agregado = agregados[resolucao] if resolucao else None
+
+    def graficos_dinamicos():
+        for param in PARAMETROS:
+            plotar_grafico_dynamic(param, df, contextlib.nullcontext(), dias=dias_grafico, agregado=agregado)
+
+    coletor.medir("graficos_dinamicos", graficos_dinamicos, anos, janela)
+
+    # 📄 Relatório
+    def html():
+        modelo = montar_modelo("Sintética", ultima_data, start_date, exceeded_messages, messages_OC)
+        modelo["graficos"] = montar_modelo_graficos({param: f"grafico:{param}" for param in imagens})
+        return renderizar("relatorio.html", modelo)
+
+    html_relatorio = coletor.medir("html", html, anos, janela)
+    gerar_pdf, motivo = _gerador_pdf()
+    if gerar_pdf is None:
+        coletor.ignorar("pdf", anos, motivo, janela)
+    else:
+        coletor.medir("pdf", lambda: gerar_pdf(html_relatorio, imagens), anos, janela, repeticoes=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--anos", type=int, nargs="+", default=[1, 5, 10], help="Tamanhos de histórico, em anos")
+    parser.add_argument("--janelas", type=int, nargs="+", default=[2, 30, 365], help="Janelas analisadas, em dias")
+    parser.add_argument("--parametros-grafico", nargs="+", default=["NO2"],
+                        help="Parâmetros dos gráficos estáticos")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções por etapa (vale o melhor tempo)")
+    parser.add_argument("--excel", action="store_true", help="Medir também a leitura da planilha (lento)")
+    parser.add_argument("--saida", default="bench_pipeline.json", help="Arquivo JSON com os resultados")
+    args = parser.parse_args()
+
+    coletor = Coletor(args.repeticoes)
+    with tempfile.TemporaryDirectory(prefix="bench-") as pasta:
+        for anos in args.anos:
+            medir_historico(coletor, anos, args, pasta)
+
+    relatorio = {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "configuracao": vars(args),
+        "resultados": coletor.resultados,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
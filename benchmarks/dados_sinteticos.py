@@ -0,0 +1,122 @@
+"""
+Gerador de dados sintéticos no formato da estação COCA.
+
+Produz as mesmas colunas da planilha (concentrações e Status_*), com ciclo
+diário plausível, NOX = NO + NO2 e flags distribuídos em blocos como na
+operação real: calibração diária, manutenções de algumas horas, trechos
+inválidos curtos, falhas de aquisição (valor ausente) e raros eventos de
+força maior.
+
+Uso:
+    python benchmarks/dados_sinteticos.py --dias 30 --saida datasets/SINTETICO.xlsx
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ingestao import COLUNAS, COLUNAS_ORIGEM  # noqa: E402
+from qualidade import PARAMETROS  # noqa: E402
+
+# 🎲 Eventos de flag por dia: código -> (eventos esperados por dia, duração média em minutos)
+EVENTOS_FLAG = {
+    4: (1.0, 10),     # Dados inválidos
+    0: (0.3, 30),     # Dados ausentes
+    28: (0.05, 240),  # Manutenção
+    16: (0.005, 720), # Força maior
+}
+
+# Calibração diária (hora do dia e duração em minutos)
+CALIBRACAO = (3, 15)
+
+# Concentração típica (ppb) e amplitude do ciclo diário de cada parâmetro
+NIVEIS = {"NO": (8, 6), "NO2": (15, 8), "O3": (25, 20), "CO": (0.5, 0.3), "SO2": (3, 1), "PM10": (30, 10)}
+
+
+def _serie(rng, hora, nivel, amplitude, pico):
+    ciclo = amplitude * np.cos(2 * np.pi * (hora - pico) / 24)
+    ruido = rng.normal(0, 0.15 * nivel, len(hora))
+    return np.clip(nivel + ciclo + ruido, -1, None)
+
+
+def _flags(rng, index, minutos_amostra):
+    n = len(index)
+    flags = np.ones(n, dtype=np.int64)
+    dias = max(n * minutos_amostra / 1440, 1)
+
+    for codigo, (por_dia, duracao) in EVENTOS_FLAG.items():
+        for inicio in rng.integers(0, n, rng.poisson(por_dia * dias)):
+            tamanho = max(int(rng.exponential(duracao) / minutos_amostra), 1)
+            flags[inicio:inicio + tamanho] = codigo
+
+    hora, duracao = CALIBRACAO
+    minuto_do_dia = index.hour * 60 + index.minute
+    flags[(minuto_do_dia >= hora * 60) & (minuto_do_dia < hora * 60 + duracao)] = 9
+    return flags
+
+
+def gerar_estacao(dias, frequencia="1min", inicio="2025-01-01", seed=0):
+    """
+    Gera dados sintéticos da estação no formato interno de `ingestao.ler_planilha`.
+
+    Parâmetros:
+    - dias (int): Dias de histórico.
+    - frequencia (str): Intervalo de amostragem (frequência do pandas, ex.: "1min", "5min").
+    - inicio (str): Data da primeira amostra.
+    - seed (int): Semente do gerador aleatório.
+
+    Retorna:
+    - DataFrame indexado por "date" com as colunas de `ingestao.COLUNAS`.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(inicio, pd.Timestamp(inicio) + pd.Timedelta(days=dias), freq=frequencia,
+                          inclusive="left", name="date")
+    minutos_amostra = pd.Timedelta(frequencia).total_seconds() / 60
+    hora = (index.hour + index.minute / 60).to_numpy()
+
+    dados = {}
+    for param, pico in zip(NIVEIS, [8, 9, 15, 8, 12, 10]):
+        dados[param] = _serie(rng, hora, *NIVEIS[param], pico)
+    dados["NOX"] = dados["NO"] + dados["NO2"] + rng.normal(0, 0.3, len(index))
+
+    # Flags independentes por analisador; NO, NO2 e NOX compartilham o mesmo equipamento
+    flags_nox = _flags(rng, index, minutos_amostra)
+    for param in PARAMETROS:
+        flags = flags_nox if param in ("NO", "NO2", "NOX") else _flags(rng, index, minutos_amostra)
+        dados[param] = np.where(flags == 0, np.nan, dados[param])
+        dados[param + "flag"] = flags
+
+    return pd.DataFrame(dados, index=index)[COLUNAS[1:]]
+
+
+def para_planilha(df):
+    """Converte os dados do formato interno para as colunas da planilha de origem (Date_Time, Status_*)."""
+    planilha = df.reset_index()[COLUNAS]
+    planilha.columns = COLUNAS_ORIGEM
+    return planilha
+
+
+def gravar_planilha(df, caminho, aba="COCA"):
+    """Grava os dados sintéticos como planilha Excel no formato da estação."""
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    para_planilha(df).to_excel(caminho, sheet_name=aba, index=False)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dias", type=int, default=30, help="Dias de histórico")
+    parser.add_argument("--frequencia", default="1min", help="Intervalo de amostragem (ex.: 1min, 5min)")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do gerador aleatório")
+    parser.add_argument("--saida", required=True, help="Arquivo .xlsx gerado")
+    args = parser.parse_args()
+
+    df = gerar_estacao(args.dias, args.frequencia, seed=args.seed)
+    print(gravar_planilha(df, args.saida))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# 📂 Cache de figuras endereçado por conteúdo
+PASTA_CACHE = os.path.join(".cache", "figuras")
+
+# Tamanho máximo do cache em disco (bytes); os arquivos menos usados são removidos primeiro
+TAMANHO_MAXIMO = 200 * 1024 * 1024
+
+
+def chave_figura(parametro, index, valores, flags, configuracao):
+    """
+    Calcula a chave de uma figura a partir dos dados e das configurações de renderização.
+
+    Parâmetros:
+    - parametro (str): Nome do parâmetro.
+    - index (DatetimeIndex): Datas das amostras (intervalo de tempo).
+    - valores (array-like): Concentrações.
+    - flags (array-like): Flags.
+    - configuracao (dict): Estilo, formato e demais opções que alteram a imagem.
+
+    Retorna:
+    - Hash SHA-256 em hexadecimal.
+    """
+    h = hashlib.sha256()
+    h.update(parametro.encode())
+    h.update(np.ascontiguousarray(np.asarray(index, dtype="datetime64[ns]")).tobytes())
+    h.update(np.ascontiguousarray(np.asarray(valores, dtype=float)).tobytes())
+    h.update(np.ascontiguousarray(np.asarray(flags, dtype=float)).tobytes())
+    h.update(json.dumps(configuracao, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def obter(chave, formato="png", pasta=PASTA_CACHE):
+    """Retorna os bytes da figura em cache ou None se não existir."""
+    arquivo = os.path.join(pasta, f"{chave}.{formato}")
+    try:
+        with open(arquivo, "rb") as f:
+            dados = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(arquivo)  # Marca como usado recentemente para a remoção LRU
+    except OSError:  # Removido por outro processo após a leitura: os bytes lidos continuam válidos
+        pass
+    return dados
+
+
+def guardar(chave, dados, formato="png", pasta=PASTA_CACHE, tamanho_maximo=TAMANHO_MAXIMO):
+    """Grava os bytes da figura no cache e remove as mais antigas se o limite de tamanho for excedido."""
+    os.makedirs(pasta, exist_ok=True)
+    arquivo = os.path.join(pasta, f"{chave}.{formato}")
+    tmp = f"{arquivo}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(dados)
+    os.replace(tmp, arquivo)
+    _limitar_tamanho(pasta, tamanho_maximo)
+
+
+def _limitar_tamanho(pasta, tamanho_maximo):
+    arquivos = []
+    for entrada in os.scandir(pasta):
+        if entrada.is_file() and not entrada.name.endswith(".tmp"):
+            try:
+                stat = entrada.stat()
+            except OSError:  # Removido por outro processo durante a varredura
+                continue
+            arquivos.append((stat.st_mtime, stat.st_size, entrada.path))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= tamanho_maximo:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from qualidade import PARAMETROS
+
+# 🏷️ Códigos de flag contabilizados no índice de cobertura (código -> condição)
+CODIGOS_COBERTURA = {
+    1: "Válido",
+    4: "Inválido",
+    9: "Calibração",
+    28: "Manutenção",
+    16: "Força Maior",
+    0: "Ausente",
+}
+
+# Intervalo de amostragem esperado (usado para contar as amostras que faltam na planilha)
+FREQUENCIA_AMOSTRAGEM = pd.Timedelta(minutes=1)
+
+_CODIGOS = np.array(list(CODIGOS_COBERTURA))
+
+
+def histograma_horario(df, parametros=PARAMETROS):
+    """
+    Conta, por hora e por parâmetro, as amostras de cada código de flag.
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação no formato de `ingestao.ler_planilha`.
+    - parametros (list): Parâmetros contabilizados.
+
+    Retorna:
+    - DataFrame indexado pela hora com colunas "{p}_{código}" e "{p}_outros"
+      (códigos fora de CODIGOS_COBERTURA). Flags nulas (NaN) contam como 0,
+      "Ausente", como em `ingestao.compactar`.
+    """
+    chave = df.index.floor("h")
+    contagens = {}
+    for p in parametros:
+        flags = df[p + "flag"].fillna(0).to_numpy()
+        # Matriz n x códigos: uma passagem para todos os códigos do parâmetro
+        indicadores = flags[:, None] == _CODIGOS[None, :]
+        for i, codigo in enumerate(_CODIGOS):
+            contagens[f"{p}_{codigo}"] = indicadores[:, i]
+        contagens[f"{p}_outros"] = ~indicadores.any(axis=1)
+
+    horario = pd.DataFrame(contagens, index=df.index).groupby(chave).sum().astype("int32")
+    horario.index.name = "date"
+    return horario
+
+
+def histograma_diario(horario):
+    """Soma o histograma horário por dia (mesmas colunas de `histograma_horario`)."""
+    diario = horario.groupby(horario.index.floor("D")).sum()
+    diario.index.name = "date"
+    return diario
+
+
+def montar_indice(df, parametros=PARAMETROS):
+    """Índice de flags (horário, diário) calculado diretamente dos dados, para uso sem o store."""
+    horario = histograma_horario(df, parametros)
+    return horario, histograma_diario(horario)
+
+
+def _somar(histograma, inicio, fim):
+    # Soma das linhas com índice em [inicio, fim) localizadas por busca binária
+    i0, i1 = histograma.index.searchsorted([inicio, fim])
+    return histograma.iloc[i0:i1].sum()
+
+
+def _contar_brutos(df, inicio, fim, parametros):
+    # Bordas parciais (menos de uma hora cada) contadas diretamente nos dados de 1 minuto
+    i0, i1 = df.index.searchsorted([inicio, fim])
+    return histograma_horario(df.iloc[i0:i1], parametros).sum()
+
+
+def contar_flags(horario, diario, inicio, fim, df=None, parametros=PARAMETROS):
+    """
+    Soma os histogramas entre `inicio` e `fim` usando dias inteiros sempre que possível.
+
+    Os dias completos no intervalo vêm do histograma diário e apenas as horas
+    das bordas do histograma horário: o custo é proporcional ao número de
+    dias, não de minutos. Sem `df`, os limites são arredondados para horas
+    inteiras; com `df`, as frações de hora das bordas são contadas nos dados brutos.
+
+    Parâmetros:
+    - horario, diario (DataFrame): Saídas de `histograma_horario` e `histograma_diario`.
+    - inicio, fim (Timestamp): Período consultado (inclusivo).
+    - df (DataFrame): Dados de 1 minuto, opcionais, para as bordas exatas.
+    - parametros (list): Parâmetros contabilizados nas bordas.
+
+    Retorna:
+    - Series com a soma de cada coluna do histograma.
+    """
+    inicio = pd.Timestamp(inicio)
+    fim = pd.Timestamp(fim) + FREQUENCIA_AMOSTRAGEM  # Limite final exclusivo
+    if df is None:
+        h0, h1 = inicio.floor("h"), fim.ceil("h")
+    else:
+        h0, h1 = inicio.ceil("h"), fim.floor("h")
+        if h0 >= h1:
+            return _contar_brutos(df, inicio, fim, parametros)
+
+    d0, d1 = h0.ceil("D"), h1.floor("D")
+    if d0 >= d1:
+        total = _somar(horario, h0, h1)
+    else:
+        total = _somar(horario, h0, d0) + _somar(diario, d0, d1) + _somar(horario, d1, h1)
+
+    if df is not None:
+        total = total + _contar_brutos(df, inicio, h0, parametros) + _contar_brutos(df, h1, fim, parametros)
+    return total
+
+
+def cobertura(horario, diario, inicio, fim, parametros=PARAMETROS, df=None):
+    """
+    Percentual do período coberto por cada condição de flag, por parâmetro.
+
+    As amostras esperadas são contadas pela FREQUENCIA_AMOSTRAGEM no período
+    consultado; minutos sem linha na planilha contam como "Ausente".
+
+    Parâmetros:
+    - horario, diario (DataFrame): Índice de flags (ver `histograma_horario`).
+    - inicio, fim (Timestamp): Período consultado (inclusivo).
+    - parametros (list): Parâmetros incluídos.
+    - df (DataFrame): Dados de 1 minuto para as bordas exatas (ver `contar_flags`);
+      sem eles, o período é arredondado para horas inteiras.
+
+    Retorna:
+    - DataFrame indexado pelo parâmetro com "esperadas" e uma coluna (%) por
+      condição de CODIGOS_COBERTURA, mais "Outros".
+    """
+    contagens = contar_flags(horario, diario, inicio, fim, df, parametros)
+    inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim) + FREQUENCIA_AMOSTRAGEM
+    if df is None:
+        inicio, fim = inicio.floor("h"), fim.ceil("h")
+    esperadas = int((fim - inicio) / FREQUENCIA_AMOSTRAGEM)
+
+    linhas = {}
+    for p in parametros:
+        linha = {condicao: contagens.get(f"{p}_{codigo}", 0) for codigo, condicao in CODIGOS_COBERTURA.items()}
+        linha["Outros"] = contagens.get(f"{p}_outros", 0)
+        # Minutos sem nenhuma linha na planilha também são dados ausentes
+        linha["Ausente"] += max(esperadas - sum(linha.values()), 0)
+        linhas[p] = {"esperadas": esperadas, **{c: 100.0 * n / esperadas for c, n in linha.items()}}
+
+    tabela = pd.DataFrame.from_dict(linhas, orient="index")
+    tabela.index.name = "parametro"
+    return tabela
@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from cobertura import FREQUENCIA_AMOSTRAGEM
+from episodios import TOLERANCIA_EPISODIO, agrupar_episodios
+from janelas_moveis import epoch_ns, media_movel, medias_horarias
+
+# 📊 Definição dos limites da CONAMA
+LIMITES = {
+    "NO2": 250,
+    "O3": 130,
+    "CO": 9,
+    "SO2": 50,
+    "PM10": 100,
+}
+
+# 🔄 Janela da média móvel e mínimo de médias horárias válidas na janela, por poluente
+JANELAS = {
+    "NO2": ("1h", 1),
+    "O3": ("8h", 6),
+    "CO": ("8h", 6),
+    "SO2": ("24h", 18),
+    "PM10": ("24h", 18),
+}
+
+# 📶 Captura mínima de dados válidos (%) para que o período seja representativo
+CAPTURA_MINIMA = 75
+
+# ⏱️ Base das médias móveis: "horaria" (médias horárias e depois a janela, como define a CONAMA;
+# o mínimo de JANELAS conta horas válidas) ou "amostras" (janela direto sobre as amostras, como o rolling do pandas)
+BASE_MEDIAS = "horaria"
+
+# Amostras válidas necessárias para uma média horária válida (CAPTURA_MINIMA da hora)
+AMOSTRAS_MINIMAS_HORA = math.ceil(CAPTURA_MINIMA / 100 * (pd.Timedelta(hours=1) / FREQUENCIA_AMOSTRAGEM))
+
+# Por base: maior intervalo entre médias de um mesmo intervalo de ultrapassagem e duração de cada média
+# (na base horária o índice marca o início da hora, que termina uma hora depois)
+TOLERANCIA_BASE = {"horaria": pd.Timedelta(hours=1), "amostras": TOLERANCIA_EPISODIO}
+DURACAO_BASE = {"horaria": pd.Timedelta(hours=1), "amostras": pd.Timedelta(0)}
+
+
+def medias_moveis(df, janelas=JANELAS, base=BASE_MEDIAS):
+    """
+    Calcula as médias móveis de todos os poluentes agrupando-os por janela.
+
+    As médias horárias de todos os poluentes são calculadas em uma única
+    passagem; poluentes com a mesma especificação (janela, mínimo) têm a
+    janela calculada juntos sobre a matriz numérica (ver `janelas_moveis`).
+
+    Parâmetros:
+    - df (DataFrame): Dados com índice temporal ordenado.
+    - janelas (dict): {poluente: (janela, mínimo)}.
+    - base (str): "horaria" (o mínimo conta médias horárias válidas, com
+      AMOSTRAS_MINIMAS_HORA amostras cada) ou "amostras" (o mínimo conta amostras).
+
+    Retorna:
+    - DataFrame com uma coluna de média móvel por poluente, indexado pelas
+      horas com dados ("horaria") ou pelas amostras ("amostras").
+    """
+    params = list(janelas)
+    tempos = epoch_ns(df.index)
+    matriz = df[params].to_numpy(dtype=np.float64)
+    index = df.index
+    if base == "horaria":
+        tempos, matriz = medias_horarias(tempos, matriz, AMOSTRAS_MINIMAS_HORA)
+        index = pd.DatetimeIndex(tempos.astype("datetime64[ns]"), name=df.index.name).as_unit(df.index.unit)
+    elif base != "amostras":
+        raise ValueError(f"Base de médias desconhecida: {base}")
+
+    grupos = {}
+    for i, (param, especificacao) in enumerate(janelas.items()):
+        grupos.setdefault(especificacao, []).append(i)
+
+    medias = np.empty_like(matriz)
+    for (janela, minimo), colunas in grupos.items():
+        medias[:, colunas] = media_movel(tempos, matriz[:, colunas], pd.Timedelta(janela).value, minimo)
+    return pd.DataFrame(medias, index=index, columns=params)
+
+
+def verificar_limites(df, inicio=None, limites=LIMITES, janelas=JANELAS, cobertura=None,
+                      captura_minima=CAPTURA_MINIMA, base=BASE_MEDIAS):
+    """
+    Verifica a ultrapassagem dos padrões de qualidade do ar (CONAMA).
+
+    Parâmetros:
+    - df (DataFrame): Dados válidos com índice temporal ordenado.
+    - inicio (Timestamp): Início do período avaliado (as médias usam o histórico anterior).
+    - limites (dict): {poluente: limite}.
+    - janelas (dict): {poluente: (janela, mínimo)}.
+    - cobertura (DataFrame): Tabela de `cobertura.cobertura` do período; quando
+      informada, cada resultado inclui captura_pct e representativo.
+    - captura_minima (float): Percentual mínimo de dados válidos.
+    - base (str): Base das médias móveis (ver `medias_moveis`).
+
+    Retorna:
+    - Dicionário {poluente: resultado} com limite, janela, pico, pico_em (fim da
+      média de pico), intervalos de ultrapassagem [(início, fim)], pct_janelas_validas e ultrapassou.
+    """
+    medias = medias_moveis(df, {param: janelas[param] for param in limites}, base)
+    if inicio is not None:
+        medias = medias[medias.index >= inicio]
+
+    resultados = {}
+    for param, limite in limites.items():
+        serie = medias[param].to_numpy()
+        validas = ~np.isnan(serie)
+        excedido = serie > limite
+
+        if validas.any():
+            pos_pico = np.nanargmax(serie)
+            # Fim da média de pico, como nos intervalos (na base horária, o fim da hora)
+            pico, pico_em = float(serie[pos_pico]), medias.index[pos_pico] + DURACAO_BASE[base]
+        else:
+            pico, pico_em = None, None
+
+        resultados[param] = {
+            "limite": limite,
+            "janela": janelas[param][0],
+            "pico": pico,
+            "pico_em": pico_em,
+            "intervalos": [(ini, fim + DURACAO_BASE[base])
+                           for ini, fim, _ in agrupar_episodios(excedido, medias.index, TOLERANCIA_BASE[base])],
+            "pct_janelas_validas": float(100.0 * validas.mean()) if len(serie) else 0.0,
+            "ultrapassou": bool(excedido.any()),
+        }
+        if cobertura is not None and param in cobertura.index:
+            captura = float(cobertura.loc[param, "Válido"])
+            resultados[param]["captura_pct"] = captura
+            resultados[param]["representativo"] = captura >= captura_minima
+    return resultados
+
+
+def mensagens_limites(resultados, prefixo=""):
+    """
+    Gera as mensagens de ultrapassagem a partir de `verificar_limites`.
+
+    Parâmetros:
+    - resultados (dict): Saída de `verificar_limites`.
+    - prefixo (str): Texto adicionado ao início de cada mensagem (ex.: "🚨 ").
+
+    Retorna:
+    - Lista de mensagens.
+    """
+    return [
+        f"{prefixo}{param} ultrapassou {r['limite']} µg/m³ ({r['pico']:.2f}) em {r['pico_em'].strftime('%d/%m/%y %H:%M')}"
+        for param, r in resultados.items() if r["ultrapassou"]
+    ]
+
+
+def mensagens_captura(resultados, prefixo="", captura_minima=CAPTURA_MINIMA):
+    """
+    Gera avisos para os poluentes sem a captura mínima de dados válidos no período.
+
+    Parâmetros:
+    - resultados (dict): Saída de `verificar_limites` com `cobertura`.
+    - prefixo (str): Texto adicionado ao início de cada mensagem.
+
+    Retorna:
+    - Lista de mensagens.
+    """
+    return [
+        f"{prefixo}{param}: captura de dados válidos de {r['captura_pct']:.0f}% (mínimo {captura_minima}%), "
+        f"período não representativo"
+        for param, r in resultados.items() if r.get("representativo") is False
+    ]
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from episodios import TOLERANCIA_EPISODIO, agrupar_episodios
+
+# ⚗️ Consistência química dos analisadores de NOx: NO2 ≈ NOX - NO
+# Margem relativa aceita em torno de NOX - NO
+MARGEM_RELATIVA = 0.1
+
+# Tolerância mínima (ppb): perto de zero, 10% de NOX - NO fica abaixo do ruído dos analisadores
+PISO_ABSOLUTO = 2.0
+
+
+def residuo_no2(df):
+    """Resíduo NO2 - (NOX - NO) em ppb (NaN onde algum dos três valores falta)."""
+    return df["NO2"].to_numpy(dtype=float) - (df["NOX"].to_numpy(dtype=float) - df["NO"].to_numpy(dtype=float))
+
+
+def mascara_inconsistencia(df, margem=MARGEM_RELATIVA, piso=PISO_ABSOLUTO):
+    """
+    Marca as amostras em que NO2 se afasta de NOX - NO além da tolerância.
+
+    A tolerância de cada amostra é o maior valor entre `margem` * |NOX - NO| e
+    `piso`, calculada em uma única passagem vetorizada, sem criar colunas no
+    DataFrame. Amostras com valores ausentes não são marcadas.
+
+    Parâmetros:
+    - df (DataFrame): Dados com as colunas NO, NO2 e NOX.
+    - margem (float): Margem relativa (ex.: 0.1 = 10%).
+    - piso (float): Tolerância mínima, em ppb.
+
+    Retorna:
+    - Máscara booleana (ndarray).
+    """
+    no = df["NO"].to_numpy(dtype=float)
+    esperado = df["NOX"].to_numpy(dtype=float) - no
+    residuo = df["NO2"].to_numpy(dtype=float) - esperado
+    tolerancia = np.maximum(np.abs(esperado) * margem, piso)
+    with np.errstate(invalid="ignore"):
+        return np.abs(residuo) > tolerancia
+
+
+def taxa_horaria(mascara, avaliadas, index):
+    """
+    Taxa de violação por hora.
+
+    Parâmetros:
+    - mascara (ndarray): Violações.
+    - avaliadas (ndarray): Amostras que puderam ser avaliadas.
+    - index (DatetimeIndex): Índice temporal correspondente.
+
+    Retorna:
+    - DataFrame indexado pela hora com "avaliadas", "violacoes" e "taxa_pct".
+    """
+    tabela = pd.DataFrame({"avaliadas": avaliadas, "violacoes": mascara}, index=index)
+    tabela = tabela.groupby(index.floor("h")).sum()
+    tabela["taxa_pct"] = 100 * tabela["violacoes"] / tabela["avaliadas"].where(tabela["avaliadas"] > 0)
+    tabela.index.name = "date"
+    return tabela
+
+
+def avaliar_consistencia_nox(df, margem=MARGEM_RELATIVA, piso=PISO_ABSOLUTO, flags=(1,),
+                             tolerancia=TOLERANCIA_EPISODIO):
+    """
+    Avalia a consistência NO2 = NOX - NO e resume as violações.
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação (índice temporal ordenado).
+    - margem (float): Margem relativa.
+    - piso (float): Tolerância mínima, em ppb.
+    - flags (tuple): Códigos de flag de NO, NO2 e NOX em que a verificação é feita (None = todos).
+    - tolerancia (Timedelta): Maior intervalo entre amostras de um mesmo episódio.
+
+    Retorna:
+    - Dicionário com "avaliadas" e "violacoes" (totais), "episodios" (lista de
+      dicts com inicio, fim e amostras), "taxa_horaria" (ver `taxa_horaria`) e
+      "configuracao" (margem, piso, flags, tolerancia) usada na avaliação.
+    """
+    avaliadas = ~np.isnan(residuo_no2(df))
+    if flags is not None:
+        for param in ("NO", "NO2", "NOX"):
+            avaliadas &= np.isin(df[param + "flag"].to_numpy(), flags)
+    mascara = mascara_inconsistencia(df, margem, piso) & avaliadas
+
+    episodios = [{"inicio": inicio, "fim": fim, "amostras": amostras}
+                 for inicio, fim, amostras in agrupar_episodios(mascara, df.index, tolerancia)]
+    return {
+        "avaliadas": int(avaliadas.sum()),
+        "violacoes": int(mascara.sum()),
+        "episodios": episodios,
+        "taxa_horaria": taxa_horaria(mascara, avaliadas, df.index),
+        "configuracao": (margem, piso, flags, tolerancia),
+    }
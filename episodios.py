@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+# Intervalo máximo entre amostras consecutivas de um mesmo episódio
+TOLERANCIA_EPISODIO = pd.Timedelta(minutes=5)
+
+
+def agrupar_episodios(mascara, index, tolerancia=TOLERANCIA_EPISODIO):
+    """
+    Agrupa amostras consecutivas que violam uma regra em episódios.
+
+    Parâmetros:
+    - mascara (ndarray): Máscara booleana das violações.
+    - index (DatetimeIndex): Índice temporal correspondente.
+    - tolerancia (Timedelta): Maior intervalo entre amostras de um mesmo episódio.
+
+    Retorna:
+    - Lista de tuplas (início, fim, número de amostras).
+    """
+    posicoes = np.flatnonzero(mascara)
+    if not len(posicoes):
+        return []
+
+    # Comparação em timedelta64: independe da resolução do índice (ns, us...)
+    tempos = index.to_numpy()[posicoes]
+    quebras = (np.diff(posicoes) > 1) | (np.diff(tempos) > tolerancia.to_timedelta64())
+    inicios = np.r_[0, np.flatnonzero(quebras) + 1]
+    fins = np.r_[inicios[1:] - 1, len(posicoes) - 1]
+
+    return list(zip(index[posicoes[inicios]], index[posicoes[fins]], (fins - inicios + 1).tolist()))
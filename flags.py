@@ -0,0 +1,84 @@
+import numpy as np
+
+# 🏷️ Código de flag que indica dado válido
+FLAG_VALIDO = 1
+
+# Definir a altura das barras de flag nos gráficos
+FLAG_HEIGHT = 999
+
+# Condições de flag exibidas nos gráficos (código de cada condição)
+CONDICOES_FLAG = {
+    "Força Maior": 16,
+    "Calibração": 9,
+    "Dados Inválidos": 4,
+    "Dados Ausentes": 0,
+    "Manutenção": 28
+}
+
+# Lista de cores para as condições (mesma ordem de CONDICOES_FLAG)
+CORES_FLAG = ['#FFFF99', '#C3DFF9', '#FCB7AF', '#FFDA9E', '#E4F8D6']
+
+_CODIGOS = np.array(list(CONDICOES_FLAG.values()))
+
+
+def valores_validos(valores, flags):
+    """
+    Mascara os valores cujo flag não é válido, em uma única passagem vetorizada.
+
+    As condições de flag são desenhadas a partir de `intervalos_flags`; apenas a
+    máscara de validade é calculada por amostra.
+
+    Parâmetros:
+    - valores (array-like): Série de concentrações do parâmetro.
+    - flags (array-like): Série de flags correspondente.
+
+    Retorna:
+    - Array com os valores válidos (NaN onde o flag não é válido).
+    """
+    return np.where(np.asarray(flags) == FLAG_VALIDO, np.asarray(valores, dtype=float), np.nan)
+
+
+def intervalos_flags(index, flags, codigos=_CODIGOS):
+    """
+    Codifica os flags de um parâmetro em intervalos contínuos (run-length).
+
+    Amostras consecutivas com o mesmo código formam um único intervalo; uma
+    falha no índice maior que o intervalo de amostragem também encerra o
+    intervalo. Cada intervalo vai do início da primeira amostra ao fim da
+    última (instante da última + intervalo de amostragem).
+
+    Parâmetros:
+    - index (DatetimeIndex): Datas das amostras (ordenadas).
+    - flags (array-like): Flags correspondentes.
+    - codigos (array-like): Códigos mantidos (padrão: os de CONDICOES_FLAG).
+
+    Retorna:
+    - Tupla (inícios, fins, códigos) de arrays com um elemento por intervalo.
+    """
+    tempos = np.asarray(index)
+    flags = np.asarray(flags)
+    n = len(flags)
+    if n == 0:
+        return tempos[:0], tempos[:0], flags[:0]
+
+    # Intervalo de amostragem estimado pela mediana dos passos do índice
+    passos = np.diff(tempos)
+    passo = np.median(passos) if n > 1 else np.timedelta64(1, "m")
+
+    # Um intervalo começa na primeira amostra, a cada troca de código e após cada falha no índice
+    quebras = np.empty(n, dtype=bool)
+    quebras[0] = True
+    quebras[1:] = (flags[1:] != flags[:-1]) | (passos > passo)
+    inicios = np.flatnonzero(quebras)
+    fins = np.append(inicios[1:], n) - 1
+
+    mantidos = np.isin(flags[inicios], codigos)
+    inicios, fins = inicios[mantidos], fins[mantidos]
+    return tempos[inicios], tempos[fins] + passo, flags[inicios]
+
+
+def limite_superior(valores, folga=4, padrao=10):
+    """Limite do eixo Y: maior valor válido + folga, ou `padrao` se não houver valores."""
+    if np.isnan(valores).all():
+        return padrao
+    return np.nanmax(valores) + folga
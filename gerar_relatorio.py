@@ -1,182 +1,223 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from graficos_static import gerar_grafico_html
-from weasyprint import HTML
+import argparse
+import json
 import os
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
-# 📂 Carregar dados do Excel
-file_path = "./datasets/COCA-DADOS.xlsx"
-df = pd.read_excel(file_path, engine="openpyxl", sheet_name="COCA")
-
-# 🎯 Selecionar apenas as colunas necessárias
-df = df[["Date_Time", "NO", "Status_NO", "NO2", "Status_NO2", "NOX", "Status_NOX",
-         "O3", "Status_O3", "CO", "Status_CO", "SO2", "Status_SO2", "PM10", "Status_PM10"]]
-
-# 🏷️ Renomear colunas
-df.columns = ["date", "NO", "NOflag", "NO2", "NO2flag", "NOX", "NOXflag", "O3", "O3flag",
-              "CO", "COflag", "SO2", "SO2flag", "PM10", "PM10flag"]
-
-df["date"] = pd.to_datetime(df["date"])
-df.sort_values("date", inplace=True)
-df.set_index("date", inplace=True)
-
-ultima_data = df.index.max()
-start_date = df.index.max() - pd.Timedelta(days=2)  
-df_filtered = df[df.index >= start_date]
-
-# 📊 Definição dos limites da CONAMA
-limits = {
-    "NO2": 250,
-    "O3": 130,
-    "CO": 9,
-    "SO2": 50,
-    "PM10": 100,
+import pandas as pd
+from cobertura import cobertura
+from conama import mensagens_captura, mensagens_limites, verificar_limites
+from ingestao import carregar_dados, carregar_indice_flags
+from instrumentacao import etapa, finalizar_coleta, iniciar_coleta, registrar_metricas
+from modelo_relatorio import estilo_relatorio, montar_modelo, montar_modelo_graficos, renderizar
+from qualidade import PARAMETROS, avaliar_regras, formatar_ocorrencias
+from renderizacao import gravar_graficos, renderizar_graficos
+
+# 🚩 Estação padrão (usada quando nenhuma configuração é informada)
+ESTACAO_PADRAO = {
+    "estacao": "Qt - BOM RETIRO",
+    "arquivo": "./datasets/COCA-DADOS.xlsx",
+    "aba": "COCA",
+    "dias": 2,
+    "parametros": PARAMETROS,
+    "saida": ".",
+    "formato_graficos": "png",
 }
 
-# 🟡 Cálculo das médias móveis
-def rolling_mean(series, window, min_periods):
-    return series.rolling(window, min_periods=min_periods).mean()
-
-NO2_hourly_MA = rolling_mean(df_filtered["NO2"], "1h", 1)
-O3_hourly_MA = rolling_mean(df_filtered["O3"], "8h", 6)
-CO_hourly_MA = rolling_mean(df_filtered["CO"], "8h", 6)
-SO2_hourly_MA = rolling_mean(df_filtered["SO2"], "24h", 18)
-PM10_hourly_MA = rolling_mean(df_filtered["PM10"], "24h", 18)
-
-# 🚨 Verifica ultrapassagem de limites
-exceeded_messages = []
-for param, limit in limits.items():
-    exceeded = eval(f"{param}_hourly_MA") > limit
-    exceeded = exceeded[exceeded.index >= start_date]
-
-    if exceeded.any():
-        max_val = eval(f"{param}_hourly_MA").max()
-        max_time = eval(f"{param}_hourly_MA").idxmax().strftime("%d/%m/%y %H:%M")
-        exceeded_messages.append(f"{param} ultrapassou {limit} µg/m³ ({max_val:.2f}) em {max_time}")
-
-# ⚠️ Verificação de valores negativos e anomalias
-messages_OC = []
-for param in ["NO", "NO2", "NOX", "O3", "CO", "SO2"]:
-    negative_values = df_filtered[df_filtered[param] < 0]
-    for index, row in negative_values.iterrows():
-        messages_OC.append(f"{param} abaixo de 0 em {index.strftime('%d/%m/%y %H:%M')}")
-
-for param in ["PM10"]:
-    negative_values = df_filtered[df_filtered[param] < -2]
-    for index, row in negative_values.iterrows():
-        messages_OC.append(f"{param} abaixo de -2 em {index.strftime('%d/%m/%y %H:%M')}")
-
-# 📈 Criar gráficos corretamente
-graficos_path = "graficos"
-os.makedirs(graficos_path, exist_ok=True)
-
-# 📊 Gerar gráficos para os parâmetros desejados
-params = ["NO", "NO2", "NOX", "O3", "CO", "SO2", "PM10"]
-graficos_gerados = {param: gerar_grafico_html(param, df.copy()) for param in params}
-
-# 🔹 Criar um HTML formatado para A4 com gráficos organizados em uma única coluna
-html_report = f"""
-<!DOCTYPE html>
-<html lang="pt-BR">
-<head>
-    <meta charset="UTF-8">
-    <title>Relatório de Qualidade do Ar</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            background-color: #f0f0f0;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            min-height: 100vh;
-            margin: 0;
-            padding: 0;
-        }}
-        .container {{
-            width: 280mm;
-            min-height: 396mm;
-            background-color: white;
-            box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
-            padding: 15mm 10mm;
-            box-sizing: border-box;
-            position: relative;
-        }}
-        h1 {{
-            text-align: center;
-            font-size: 18px;
-            margin-bottom: 10px;
-            margin-top: -45px;
-        }}
-        h2 {{
-            font-size: 16px;
-            padding: 1px;
-            margin-bottom: 6px;
-            margin-top: 6px;
-            page-break-after: avoid;
-        }}
-        p {{
-            font-size: 14px;
-            margin: 3px;
-            margin-bottom: 1px;
-        }}
-        .exceeded-container, .alerta-container {{
-            background-color: #ffcccc;
-            padding: 2px;
-            border-radius: 5px;
-            margin-top: 5px;
-        }}
-        .graficos-container {{
-            display: block;
-            flex-direction: column;
-            align-items: center;
-            margin-top: 10px;
-            page-break-inside: auto;
-        }}
-        .graficos-container img {{
-            width: 100%;
-            max-height: 350px;
-            object-fit: contain;
-            padding: 1px;
-            page-break-before: auto;
-            align-items: center;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>INFORME DIÁRIO - {ultima_data.strftime('%d/%m/%Y')}</h1>
-        <p><b>Período:</b> {start_date.strftime('%d/%m/%Y')} a {ultima_data.strftime('%d/%m/%Y')}</p>
-        <p><b>Estação Monitorada:</b> Qt - BOM RETIRO</p>
-
-        <div class="exceeded-container">
-            <p><b>Padrão de QAr (CONAMA 506/2024):</b></p>
-            {"".join([f"<p>{msg}</p>" for msg in exceeded_messages]) if exceeded_messages else "<p>Nenhum limite foi ultrapassado.</p>"}
-        </div>
-
-        <div class="alerta-container">
-            <p><b>Ocorrências:</b></p>
-            {"".join([f"<p>{msg}</p>" for msg in messages_OC]) if messages_OC else "<p>Nenhuma ocorrência encontrada.</p>"}
-        </div>
-
-        <div class="graficos-container">
-            {"".join([f'<img src="{graficos_gerados[param]}" alt="Gráfico de {param}">' for param in params])}
-        </div>
-    </div>
-</body>
-</html>
-"""
-
-# 📄 Salvar o relatório
-with open("relatorio.html", "w", encoding="utf-8") as file:
-    file.write(html_report)
-
-print("✅ Relatório salvo como 'relatorio.html' 📄")
-
-# 📄 Converter o HTML para PDF
-html_file = "relatorio.html"
-pdf_file = "relatorio.pdf"
-
-HTML(html_file).write_pdf(pdf_file)
-
-print("✅ Relatório convertido para PDF com sucesso! 📄")
+
+def _slug(texto):
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return re.sub(r"[^A-Za-z0-9]+", "-", texto).strip("-").lower()
+
+
+@lru_cache(maxsize=1)
+def _folha_estilo():
+    # Folha de estilo analisada uma vez e reutilizada por todos os relatórios do processo
+    from weasyprint import CSS
+    return CSS(string=estilo_relatorio())
+
+
+def _url_fetcher(imagens, formato):
+    # Serve as imagens em memória para URLs "grafico:<parâmetro>"; demais URLs seguem o padrão
+    from weasyprint import default_url_fetcher
+    tipo = "image/svg+xml" if formato == "svg" else f"image/{formato}"
+
+    def fetcher(url, *args, **kwargs):
+        if url.startswith("grafico:"):
+            return {"string": imagens[url[len("grafico:"):]], "mime_type": tipo}
+        return default_url_fetcher(url, *args, **kwargs)
+
+    return fetcher
+
+
+def gerar_relatorio(estacao, max_workers_graficos=None, gravar_intermediarios=True, perfil=False, pdf=True, df=None):
+    """
+    Gera o relatório HTML/PDF de uma estação.
+
+    Parâmetros:
+    - estacao (dict): Configuração com "estacao" (nome), "arquivo", "aba", "dias",
+      "parametros", "saida" (pasta dos arquivos gerados) e "formato_graficos"
+      ("png" ou "svg"); ver ESTACAO_PADRAO.
+    - max_workers_graficos (int): Processos usados nos gráficos (1 = sequencial).
+    - gravar_intermediarios (bool): Gravar também o HTML e as imagens; se False, apenas o PDF
+      é gerado, sem arquivos intermediários.
+    - perfil (bool): Capturar perfil cProfile e pico de memória por etapa (ver `instrumentacao`).
+    - pdf (bool): Gerar o PDF; se False, apenas o HTML e as imagens (o WeasyPrint não é carregado).
+    - df (DataFrame): Dados já carregados da estação (ex.: instantâneo mantido por um
+      processo do serviço de relatórios); se None, são lidos de `estacao["arquivo"]`.
+
+    Retorna:
+    - Dicionário com a estação, os arquivos gerados (None quando não gerados), o tempo de cada etapa (s)
+      e as métricas completas da execução ("metricas", ver `instrumentacao.finalizar_coleta`).
+    """
+    estacao = {**ESTACAO_PADRAO, **estacao}
+    saida = estacao["saida"]
+    params = estacao["parametros"]
+    os.makedirs(saida, exist_ok=True)
+    coleta = iniciar_coleta(perfil=perfil, memoria=perfil)
+    try:
+        # 📂 Carregar dados do Excel (via cache colunar)
+        with etapa("carregar"):
+            if df is None:
+                df = carregar_dados(estacao["arquivo"], sheet_name=estacao["aba"], compacto=True)
+
+        ultima_data = df.index.max()
+        start_date = df.index.max() - pd.Timedelta(days=estacao["dias"])
+        df_filtered = df[df.index >= start_date]
+
+        # 📶 Cobertura de dados por condição de flag (índice mantido no store)
+        with etapa("cobertura"):
+            horario, diario = carregar_indice_flags(df, estacao["arquivo"], sheet_name=estacao["aba"])
+            tabela_cobertura = cobertura(horario, diario, start_date, ultima_data, df=df)
+
+        # 🚨 Verifica ultrapassagem de limites (médias móveis CONAMA) e a captura mínima de dados
+        with etapa("limites"):
+            limites_resultado = verificar_limites(df_filtered, start_date, cobertura=tabela_cobertura)
+            exceeded_messages = mensagens_limites(limites_resultado) + mensagens_captura(limites_resultado)
+
+        # ⚠️ Verificação de valores negativos e anomalias (agrupadas em episódios)
+        with etapa("ocorrencias"):
+            messages_OC = formatar_ocorrencias(avaliar_regras(df_filtered))
+
+        # 📊 Gerar gráficos em memória para os parâmetros desejados (um processo por gráfico)
+        formato = estacao["formato_graficos"]
+        with etapa("graficos"):
+            imagens = renderizar_graficos(df, params, max_workers_graficos, formato)
+
+        # 🧱 Modelo estruturado do relatório (cabeçalho, CONAMA, ocorrências, gráficos)
+        modelo = montar_modelo(estacao["estacao"], ultima_data, start_date, exceeded_messages, messages_OC,
+                               cobertura=tabela_cobertura)
+
+        # 📄 Salvar o relatório e os gráficos (opcional)
+        html_file = None
+        with etapa("html"):
+            if gravar_intermediarios:
+                graficos_gerados = gravar_graficos(imagens, os.path.join(saida, "graficos"), formato)
+                fontes = {param: os.path.relpath(arquivo, saida) for param, arquivo in graficos_gerados.items()}
+                html_file = os.path.join(saida, "relatorio.html")
+                tmp = f"{html_file}.{os.getpid()}.tmp"
+                renderizar("relatorio.html", {**modelo, "graficos": montar_modelo_graficos(fontes)}, tmp,
+                           estilo=estilo_relatorio())
+                os.replace(tmp, html_file)
+
+        # 📄 Converter o HTML (em memória) para PDF, com as imagens servidas pelo url_fetcher
+        pdf_file = os.path.join(saida, "relatorio.pdf") if pdf else None
+        if pdf:
+            with etapa("pdf"):
+                # WeasyPrint (e suas bibliotecas nativas) só é carregado na etapa de PDF
+                from weasyprint import HTML
+                modelo["graficos"] = montar_modelo_graficos({param: f"grafico:{param}" for param in params})
+                html_pdf = renderizar("relatorio.html", modelo)
+                # Gravado em arquivo temporário e renomeado: quem lê o PDF anterior nunca vê um arquivo parcial
+                tmp = f"{pdf_file}.{os.getpid()}.tmp"
+                HTML(string=html_pdf, base_url=saida, url_fetcher=_url_fetcher(imagens, formato)).write_pdf(
+                    tmp, stylesheets=[_folha_estilo()])
+                os.replace(tmp, pdf_file)
+    finally:
+        metricas = finalizar_coleta(coleta)
+
+    return {"estacao": estacao["estacao"], "html": html_file, "pdf": pdf_file, "tempos": coleta.tempos(),
+            "metricas": metricas}
+
+
+def _imprimir_resultado(resultado, arquivo_metricas=None):
+    etapas = " ".join(f"{nome}={segundos:.2f}s" for nome, segundos in resultado["tempos"].items())
+    print(f"✅ {resultado['estacao']}: {resultado['pdf']} ({etapas})")
+
+    metricas = resultado["metricas"]
+    registrar_metricas(metricas, arquivo_metricas, estacao=resultado["estacao"], pdf=resultado["pdf"])
+    if metricas["perfil"]:
+        perfil_file = os.path.join(os.path.dirname(resultado["pdf"]), "perfil.txt")
+        with open(perfil_file, "w", encoding="utf-8") as f:
+            f.write(metricas["perfil"])
+        print(f"   🔍 Perfil: {perfil_file}")
+
+
+def main(argv=None):
+    """
+    Ponto de entrada da linha de comando.
+
+    Sem argumentos, gera o relatório da estação padrão em 'relatorio.html' e
+    'relatorio.pdf'. Com --config, gera os relatórios de todas as estações do
+    arquivo JSON (lista de objetos no formato de ESTACAO_PADRAO) em paralelo;
+    estações sem "saida" são gravadas em relatorios/<nome-da-estacao>/.
+
+    Retorna:
+    - Código de saída (0 = sucesso, 1 = alguma estação falhou).
+    """
+    parser = argparse.ArgumentParser(description="Gera os relatórios de qualidade do ar (HTML e PDF).")
+    parser.add_argument("--config", help="Arquivo JSON com a lista de estações")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: nº de CPUs)")
+    parser.add_argument("--sem-intermediarios", action="store_true",
+                        help="Gerar apenas o PDF, sem gravar o HTML e as imagens dos gráficos")
+    parser.add_argument("--metricas", help="Arquivo JSON Lines onde anexar as métricas de cada estação")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Capturar perfil (cProfile) e pico de memória por etapa; grava perfil.txt junto ao PDF")
+    args = parser.parse_args(argv)
+
+    if args.config is None:
+        estacoes = [ESTACAO_PADRAO]
+    else:
+        with open(args.config, encoding="utf-8") as f:
+            estacoes = []
+            for entrada in json.load(f):
+                # Padrões aplicados antes de derivar a pasta de saída (o nome da estação é opcional)
+                estacao = {**ESTACAO_PADRAO, **entrada}
+                if "saida" not in entrada:
+                    estacao["saida"] = os.path.join("relatorios", _slug(estacao["estacao"]))
+                estacoes.append(estacao)
+
+    saidas = [os.path.abspath(e["saida"]) for e in estacoes]
+    duplicadas = {s for s in saidas if saidas.count(s) > 1}
+    if duplicadas:
+        print(f"❌ Pastas de saída repetidas na configuração: {', '.join(sorted(duplicadas))}", file=sys.stderr)
+        return 1
+
+    falhas = 0
+    if len(estacoes) == 1:
+        try:
+            _imprimir_resultado(gerar_relatorio(estacoes[0], args.workers, not args.sem_intermediarios, args.perfil),
+                                args.metricas)
+        except Exception as erro:
+            print(f"❌ {estacoes[0]['estacao']}: {type(erro).__name__}: {erro}", file=sys.stderr)
+            falhas += 1
+    else:
+        # Uma estação por processo; os gráficos de cada estação são renderizados sequencialmente
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futuros = {executor.submit(gerar_relatorio, estacao, 1, not args.sem_intermediarios, args.perfil): estacao
+                       for estacao in estacoes}
+            for futuro, estacao in futuros.items():
+                try:
+                    _imprimir_resultado(futuro.result(), args.metricas)
+                except Exception as erro:
+                    print(f"❌ {estacao['estacao']}: {type(erro).__name__}: {erro}", file=sys.stderr)
+                    falhas += 1
+
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
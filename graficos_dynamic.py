@@ -1,11 +1,17 @@
+import numpy as np
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
 from datetime import timedelta
+from amostragem import PONTOS_PADRAO, reduzir_minmax
+from flags import CONDICOES_FLAG, CORES_FLAG, intervalos_flags, limite_superior, valores_validos
+from instrumentacao import etapa, medido
+from janela import colunas_janela, limites_janela
 
-def plotar_grafico_dynamic(parametro, df, col, font_color='black'):
+@medido("grafico_dinamico")
+def plotar_grafico_dynamic(parametro, df, col, font_color='black', dias=30, agregado=None,
+                           intervalo=None, n_pontos=PONTOS_PADRAO):
     """
-    Gera um gráfico interativo no Streamlit para o parâmetro selecionado, considerando os últimos 30 dias.
+    Gera um gráfico interativo no Streamlit para o parâmetro selecionado, considerando os últimos `dias` dias.
 
     Parâmetros:
     - parametro (str): Nome do parâmetro a ser exibido no gráfico.
@@ -13,23 +19,31 @@ def plotar_grafico_dynamic(parametro, df, col, font_color='black'):
     - col (Streamlit Column): Coluna onde o gráfico será renderizado.
     - font_size (int): Tamanho da fonte das legendas e eixos.
     - font_color (str): Cor da fonte das legendas e eixos.
+    - dias (int): Janela exibida, em dias.
+    - agregado (DataFrame): Nível da pirâmide de agregados (ver `agregados.py`) usado
+      no lugar dos dados brutos em janelas longas; exibe média e faixa mín./máx.
+    - intervalo (tuple): (início, fim) visível; substitui a janela de `dias` ao aproximar o gráfico.
+    - n_pontos (int): Quantidade aproximada de pontos enviados ao navegador (redução mín./máx.).
     """
-    # Converter o índice para datetime se necessário
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df.index = pd.to_datetime(df.index)
-    
-    # Determinar a última data no DataFrame
-    ultima_data = df.index.max()
-    data_inicio = ultima_data - timedelta(days=30)
-    
-    # Filtrar os últimos 30 dias
-    df = df.loc[data_inicio:ultima_data]
+    # Janela exibida: últimos `dias` dias ou o intervalo aproximado
+    data_inicio, ultima_data = limites_janela(df.index, dias, intervalo)
+
+    # Intervalos contínuos de cada condição de flag (sempre a partir dos dados de 1 minuto)
+    index_flags, (flags,) = colunas_janela(df, [parametro + "flag"], data_inicio, ultima_data)
+    intervalos = intervalos_flags(index_flags, flags)
     
-    # Criar coluna correspondente ao flag do parâmetro selecionado
-    flag_column = parametro + "flag"
+    if agregado is not None:
+        # Janelas longas: usar as médias pré-agregadas em vez dos dados de 1 minuto
+        index, (valores, minimos, maximos) = colunas_janela(
+            agregado, [parametro + "_media", parametro + "_min", parametro + "_max"], data_inicio, ultima_data)
+        limite_y = maximos
+    else:
+        # Visões somente leitura do parâmetro e do seu flag (sem copiar nem alterar o DataFrame)
+        index, (valores,) = colunas_janela(df, [parametro], data_inicio, ultima_data)
     
-    # Filtrar apenas os dados onde o flag indica válido
-    df[parametro] = df.apply(lambda x: x[parametro] if x[flag_column] == 1 else None, axis=1)
+        # Filtrar apenas os dados onde o flag indica válido
+        valores = valores_validos(valores, flags)
+        limite_y = valores
     
     # Configuração do gráfico no Streamlit
     with col:
@@ -37,22 +51,42 @@ def plotar_grafico_dynamic(parametro, df, col, font_color='black'):
     
     # Criar a figura do Plotly
     fig = go.Figure()
-    
+    topo = limite_superior(limite_y)
+
+    # Faixas das condições de flag atrás da linha do parâmetro (um traço por condição)
+    fig.add_traces(faixas_flags(*intervalos, topo))
+
+    if agregado is not None:
+        # Faixa entre o mínimo e o máximo de cada período agregado
+        fig.add_trace(go.Scatter(
+            x=index, y=maximos, mode='lines', line=dict(width=0),
+            hoverinfo='skip', showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=index, y=minimos, mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor='rgba(0, 0, 255, 0.15)', hoverinfo='skip', showlegend=False
+        ))
+
+    # Reduzir os pontos enviados ao navegador mantendo picos e falhas
+    with etapa("reducao"):
+        x, y = reduzir_minmax(index, valores, n_pontos)
+
     # Adicionar a linha do parâmetro escolhido
     fig.add_trace(go.Scatter(
-        x=df.index, 
-        y=df[parametro],
+        x=x, 
+        y=y,
         mode='lines',
         name=parametro,
         line=dict(color='blue', width=2),
         marker=dict(size=6),
-        hoverinfo='text+y',
-        text=df.index.strftime('%d/%m/%y %H:%M')
+        hovertemplate='%{y:.2f}<extra></extra>',
+        showlegend=False
     ))
     
     # Melhorando a formatação do eixo X e Y
     fig.update_xaxes(
         tickformat='%d/%m/%y',
+        hoverformat='%d/%m/%y %H:%M',
         tickangle=-45,
         #title_text='Data e Hora',
         title_font=dict(size=14, color=font_color),
@@ -61,12 +95,12 @@ def plotar_grafico_dynamic(parametro, df, col, font_color='black'):
         linewidth=2,
         linecolor='black',
         mirror=True,
-        dtick=86400000.0
+        dtick=86400000.0 if ultima_data - data_inicio <= timedelta(days=31) else None  # Um rótulo por dia apenas em janelas curtas
     )
     
     fig.update_yaxes(
         title_text=f'{parametro} (ppb)', 
-        range=[0, df[parametro].max() + 4 if not df[parametro].isnull().all() else 10],
+        range=[0, topo],
         title_font=dict(size=14, color=font_color),
         tickfont=dict(size=14, color=font_color),
         showline=True,
@@ -82,9 +116,40 @@ def plotar_grafico_dynamic(parametro, df, col, font_color='black'):
         hovermode='x unified',
         plot_bgcolor='white',
         paper_bgcolor='white',
-        showlegend=False
+        legend=dict(orientation='h', yanchor='bottom', y=1.0, xanchor='right', x=1.0,
+                    font=dict(size=12, color=font_color))
     )
     
     # Exibir o gráfico no Streamlit
-    with col:
+    with col, etapa("envio"):
         st.plotly_chart(fig, use_container_width=True)
+
+
+def faixas_flags(inicios, fins, codigos, topo):
+    """
+    Converte os intervalos de `flags.intervalos_flags` em traços preenchidos do Plotly.
+
+    Cada condição vira um único `go.Scatter` com `fill='toself'`: os
+    retângulos (de 0 a `topo` no eixo Y) são polígonos separados por None, de
+    modo que o custo no layout e no navegador não cresce com o número de
+    intervalos. A borda fina mantém visíveis os intervalos mais curtos que um pixel.
+
+    Retorna:
+    - Lista de traços (somente as condições presentes na janela).
+    """
+    faixas = []
+    for (condicao, codigo), cor in zip(CONDICOES_FLAG.items(), CORES_FLAG):
+        selecao = codigos == codigo
+        n = int(selecao.sum())
+        if n == 0:
+            continue
+        # Polígono de cada intervalo: (x0, 0) (x0, topo) (x1, topo) (x1, 0) e None para separar do próximo
+        x = np.full((n, 5), None, dtype=object)
+        x[:, 0] = x[:, 1] = np.datetime_as_string(inicios[selecao], unit="s")
+        x[:, 2] = x[:, 3] = np.datetime_as_string(fins[selecao], unit="s")
+        y = np.tile(np.array([0, topo, topo, 0, None], dtype=object), n)
+        faixas.append(go.Scatter(
+            x=x.ravel(), y=y, mode='lines', fill='toself', fillcolor=cor, line=dict(width=0.5, color=cor),
+            name=condicao, legendgroup=condicao, hoverinfo='skip'
+        ))
+    return faixas
@@ -1,14 +1,22 @@
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib.lines import Line2D
-import streamlit as st  # Importação mantida dentro da função para evitar conflitos
-import pandas as pd
+import io
 import os
+import numpy as np
+import cache_figuras
+from flags import CONDICOES_FLAG, CORES_FLAG, FLAG_HEIGHT, intervalos_flags, limite_superior, valores_validos
+from instrumentacao import etapa, medido
+from janela import janela_parametro
 
-# 📂 Criar pasta para armazenar os gráficos
+# 📂 Pasta padrão dos gráficos gravados (criada apenas quando um gráfico é salvo)
 graficos_path = "graficos"
-os.makedirs(graficos_path, exist_ok=True)
 
+# 🎨 Estilos de renderização (tamanho da figura e das fontes)
+ESTILOS = {
+    "streamlit": {"figsize": (14, 6), "x_labelsize": 12, "ylabel_fontsize": 14, "y_labelsize": 14, "legend_fontsize": "large"},
+    "relatorio": {"figsize": (14, 4), "x_labelsize": 10, "ylabel_fontsize": 12, "y_labelsize": 12, "legend_fontsize": "small"},
+}
+
+
+@medido("grafico_estatico")
 def plotar_grafico(parametro, df, col):
     """
     Gera um gráfico no Streamlit para o parâmetro selecionado, considerando os últimos 30 dias.
@@ -17,158 +25,146 @@ def plotar_grafico(parametro, df, col):
     - parametro (str): Nome do parâmetro a ser exibido no gráfico.
     - df (DataFrame): DataFrame contendo os dados processados.
     """
-    # Converter o índice para datetime se necessário
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df.index = pd.to_datetime(df.index)
-    
-    # Determinar a última data no DataFrame
-    ultima_data = df.index.max()
-    data_inicio = ultima_data - pd.Timedelta(days=30)
-    
-    # Filtrar os últimos 30 dias
-    df = df.loc[data_inicio:ultima_data]
-    
-    # Criar coluna correspondente ao flag do parâmetro selecionado
-    flag_column = parametro + "flag"
-
-    # Definir a altura das linhas de flag
-    flag_height = 999  # Ajuste conforme necessário
-
-    # Criar colunas para diferentes condições de flag
-    conditions_map = {
-        "Força Maior": 16,
-        "Calibração": 9,
-        "Dados Inválidos": 4,
-        "Dados Ausentes": 0,
-        "Manutenção": 28
-    }
-
-    for condition, flag_value in conditions_map.items():
-        df[condition] = df[flag_column].apply(lambda x: flag_height if x == flag_value else 0)
-
-    # Filtrar apenas os dados onde o flag indica válido
-    df[parametro] = df.apply(lambda x: x[parametro] if x[flag_column] == 1 else None, axis=1)
+    import streamlit as st  # Importação adiada: a geração de relatórios não depende do Streamlit
+
+    # Visões somente leitura dos últimos 30 dias (sem copiar nem alterar o DataFrame)
+    index, valores, flags = janela_parametro(df, parametro, dias=30)
 
     # Configuração do gráfico no Streamlit
     with col: st.markdown(f"<p style='font-size:14px; font-weight:bold; color:black; text-align:center; margin-bottom:20px;;'>Gráfico de {parametro}</p>", unsafe_allow_html=True)
 
-    fig, ax = plt.subplots(figsize=(14, 6))
-    fig.canvas.mpl_connect('motion_notify_event', lambda event: ax.annotate(f'{event.xdata:.2f}, {event.ydata:.2f}', xy=(event.xdata, event.ydata), xytext=(10,10), textcoords='offset points', fontsize=10, color='black', bbox=dict(boxstyle='round,pad=0.3', edgecolor='gray', facecolor='white')) if event.xdata and event.ydata else None)
-
+    # Renderizar (ou reaproveitar do cache) a imagem do gráfico
+    imagem = renderizar_grafico_bytes(parametro, index, valores, flags, estilo="streamlit")
+    with col:
+        st.image(imagem, width="stretch")
 
-    # Lista de cores para as condições
-    colors = ['#FFFF99', '#C3DFF9', '#FCB7AF', '#FFDA9E', '#E4F8D6']
-    conditions = list(conditions_map.keys())
 
-    # Plotar as barras para indicar as condições
-    bar_width = 0.05  # Ajuste da largura das barras
-    for condition, color in zip(conditions, colors):
-        ax.bar(df.index, df[condition], width=bar_width, color=color, label=condition)
+def renderizar_grafico_bytes(parametro, index, valores, flags, estilo="relatorio", formato="png", usar_cache=True):
+    """
+    Renderiza o gráfico de flags de um parâmetro e retorna a imagem em bytes.
 
-    # Plotar a linha do parâmetro escolhido
-    ax.plot(df.index, df[parametro], label=parametro, color='blue', linewidth=2.5)
+    Usa a API orientada a objetos do matplotlib (Figure), sem o estado global
+    do pyplot, para poder ser chamada em paralelo em processos de trabalho.
+    O resultado é guardado em um cache endereçado pelo hash dos dados e do
+    estilo: se nada mudou, o matplotlib não é acionado.
 
-    # Melhorando a formatação do eixo X
-    ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))  # Define espaçamento de 5 dias entre as datas  # Define espaçamento automático das datas
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%y'))  # Formata as datas no eixo X
-    plt.xticks(rotation=45, ha="right")  # Rotaciona e alinha os rótulos do eixo X
-    ax.tick_params(axis='x', labelsize=12)
+    Parâmetros:
+    - parametro (str): Nome do parâmetro.
+    - index (DatetimeIndex): Datas das amostras.
+    - valores (array-like): Concentrações do parâmetro.
+    - flags (array-like): Flags do parâmetro.
+    - estilo (str): Chave de ESTILOS ("streamlit" ou "relatorio").
+    - formato (str): Formato da imagem ("png" ou "svg").
+    - usar_cache (bool): Consultar e alimentar o cache de figuras.
 
-    # Ajuste dos limites do eixo Y
-    ax.set_ylim(0, df[parametro].max() + 4 if not df[parametro].isnull().all() else 10)
-    ax.set_ylabel(f"{parametro} (ppb)", fontsize=14)  # Adiciona o nome do parâmetro no eixo Y
+    Retorna:
+    - Bytes da imagem.
+    """
+    configuracao = {"estilo": ESTILOS[estilo], "formato": formato}
+    if usar_cache:
+        with etapa("cache"):
+            chave = cache_figuras.chave_figura(parametro, index, valores, flags, configuracao)
+            imagem = cache_figuras.obter(chave, formato)
+        if imagem is not None:
+            return imagem
+
+    with etapa("figura"):
+        # Matplotlib só é importado quando uma figura precisa de fato ser desenhada (falha no cache)
+        import matplotlib.dates as mdates
+        from matplotlib.artist import setp
+        from matplotlib.figure import Figure
+        from matplotlib.lines import Line2D
+
+        opcoes = ESTILOS[estilo]
+
+        # Decodificar flags: valores válidos e intervalos contínuos de cada condição
+        valores = valores_validos(valores, flags)
+        inicios, fins, codigos = intervalos_flags(index, flags)
+        inicios, fins = mdates.date2num(inicios), mdates.date2num(fins)
+
+        # Criando o gráfico
+        fig = Figure(figsize=opcoes["figsize"])
+        ax = fig.subplots()
+
+        # Faixas das condições: uma coleção de retângulos por condição (e não uma barra por amostra).
+        # A borda fina mantém visíveis os intervalos mais curtos que um pixel.
+        for (condition, codigo), color in zip(CONDICOES_FLAG.items(), CORES_FLAG):
+            selecao = codigos == codigo
+            if selecao.any():
+                faixas = np.column_stack([inicios[selecao], fins[selecao] - inicios[selecao]])
+                ax.broken_barh(faixas, (0, FLAG_HEIGHT), facecolors=color, edgecolors=color,
+                               linewidth=0.5, label=condition)
+
+        # Plotar a linha do parâmetro escolhido
+        ax.plot(index, valores, label=parametro, color='blue', linewidth=2.5)
+
+        # Melhorando a formatação do eixo X
+        ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%y'))
+        setp(ax.get_xticklabels(), rotation=45, ha="right")
+        ax.tick_params(axis='x', labelsize=opcoes["x_labelsize"])
+
+        # Ajuste dos limites do eixo Y
+        ax.set_ylim(0, limite_superior(valores))
+        ax.set_ylabel(f"{parametro} (ppb)", fontsize=opcoes["ylabel_fontsize"])
+
+        # Configuração da grade no eixo Y
+        ax.tick_params(axis='y', labelsize=opcoes["y_labelsize"])
+        ax.grid(True, which='major', axis='y', linestyle='--', linewidth=0.5)
+
+        # Criar legenda personalizada
+        legend_elements = [
+            Line2D([0], [0], color=color, lw=4, label=condition) for condition, color in zip(CONDICOES_FLAG, CORES_FLAG)
+        ]
+        ax.legend(handles=legend_elements, loc='upper left', fontsize=opcoes["legend_fontsize"], frameon=True)
+
+    # Salvar gráfico em memória
+    with etapa("salvar"):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=formato, bbox_inches="tight")
+        imagem = buffer.getvalue()
+
+    if usar_cache:
+        cache_figuras.guardar(chave, imagem, formato)
+    return imagem
+
+
+def gerar_grafico_html(parametro, df, destino=None):
+    """
+    Gera um gráfico do parâmetro selecionado e salva como imagem.
 
-    # Configuração da grade no eixo Y
-    ax.tick_params(axis='y', labelsize=14)
-    ax.grid(True, which='major', axis='y', linestyle='--', linewidth=0.5)
+    Parâmetros:
+    - parametro (str): Nome do parâmetro a ser exibido no gráfico.
+    - df (DataFrame): DataFrame contendo os dados processados.
+    - destino (str): Pasta de saída (padrão: "graficos").
 
-    # Criar legenda personalizada e corrigir o problema da sobreposição
-    legend_elements = [
-        Line2D([0], [0], color=color, lw=4, label=condition) for condition, color in zip(conditions, colors)
-    ]
-    ax.legend(handles=legend_elements, loc='upper left', fontsize='large', frameon=True)
+    Retorna:
+    - Caminho do arquivo salvo.
+    """
+    # 🔹 Visões somente leitura dos últimos 30 dias
+    index, valores, flags = janela_parametro(df, parametro, dias=30)
 
-    # Ajuste do layout para evitar cortes no gráfico
-    plt.tight_layout()
-    col1, col2 = st.columns(2) if 'col1' not in locals() else (col1, col2)
-    with col:
-        st.pyplot(fig)
+    pasta = destino or graficos_path
+    os.makedirs(pasta, exist_ok=True)
+    grafico_file = f"{pasta}/{parametro}.png"
+    return renderizar_grafico_png(parametro, index, valores, flags, grafico_file)
 
 
-def gerar_grafico_html(parametro, df):
+def renderizar_grafico_png(parametro, index, valores, flags, grafico_file):
     """
-    Gera um gráfico do parâmetro selecionado e salva como imagem.
+    Salva o gráfico de flags de um parâmetro como PNG (ver `renderizar_grafico_bytes`).
 
     Parâmetros:
-    - parametro (str): Nome do parâmetro a ser exibido no gráfico.
-    - df (DataFrame): DataFrame contendo os dados processados.
+    - parametro (str): Nome do parâmetro.
+    - index (DatetimeIndex): Datas das amostras.
+    - valores (array-like): Concentrações do parâmetro.
+    - flags (array-like): Flags do parâmetro.
+    - grafico_file (str): Caminho do PNG gerado.
 
     Retorna:
     - Caminho do arquivo salvo.
     """
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df.index = pd.to_datetime(df.index)
-    
-    # 🔹 Filtrar os últimos 30 dias
-    ultima_data = df.index.max()
-    data_inicio = ultima_data - pd.Timedelta(days=30)
-    df = df.loc[data_inicio:ultima_data]
-    
-    flag_column = parametro + "flag"
-    flag_height = 999  # Altura das flags
-
-    # Criar colunas para diferentes condições de flag
-    conditions_map = {
-        "Força Maior": 16,
-        "Calibração": 9,
-        "Dados Inválidos": 4,
-        "Dados Ausentes": 0,
-        "Manutenção": 28
-    }
-
-    for condition, flag_value in conditions_map.items():
-        df.loc[:, condition] = df[flag_column].apply(lambda x: flag_height if x == flag_value else 0)
-
-    df.loc[:, parametro] = df.apply(lambda x: x[parametro] if x[flag_column] == 1 else None, axis=1)
-
-    # Criando o gráfico
-    fig, ax = plt.subplots(figsize=(14, 4))
-
-    # Lista de cores para as condições
-    colors = ['#FFFF99', '#C3DFF9', '#FCB7AF', '#FFDA9E', '#E4F8D6']
-    conditions = list(conditions_map.keys())
-
-    # Plotar as barras para indicar as condições
-    bar_width = 0.05
-    for condition, color in zip(conditions, colors):
-        ax.bar(df.index, df[condition], width=bar_width, color=color, label=condition)
-
-    # Plotar a linha do parâmetro escolhido
-    ax.plot(df.index, df[parametro], label=parametro, color='blue', linewidth=2.5)
-
-    # Melhorando a formatação do eixo X
-    ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%y'))
-    plt.xticks(rotation=45, ha="right")
-    ax.tick_params(axis='x', labelsize=10)
-
-    # Ajuste dos limites do eixo Y
-    ax.set_ylim(0, df[parametro].max() + 4 if not df[parametro].isnull().all() else 10)
-    ax.set_ylabel(f"{parametro} (ppb)", fontsize=12)
-
-    # Configuração da grade no eixo Y
-    ax.tick_params(axis='y', labelsize=12)
-    ax.grid(True, which='major', axis='y', linestyle='--', linewidth=0.5)
-
-    # Criar legenda personalizada
-    legend_elements = [
-        Line2D([0], [0], color=color, lw=4, label=condition) for condition, color in zip(conditions, colors)
-    ]
-    ax.legend(handles=legend_elements, loc='upper left', fontsize='small', frameon=True)
-
-    # Salvar gráfico
-    grafico_file = f"{graficos_path}/{parametro}.png"
-    plt.savefig(grafico_file, bbox_inches="tight")
-    plt.close()
-
-    return grafico_file
\ No newline at end of file
+    imagem = renderizar_grafico_bytes(parametro, index, valores, flags, estilo="relatorio")
+    with open(grafico_file, "wb") as f:
+        f.write(imagem)
+    return grafico_file
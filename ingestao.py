@@ -0,0 +1,563 @@
+import hashlib
+import json
+import operator
+import os
+import shutil
+from contextlib import contextmanager
+
+import pandas as pd
+
+from agregados import RESOLUCOES, agregar_diario, agregar_horario
+from cobertura import histograma_diario, histograma_horario, montar_indice
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Sem pyarrow o cache é desativado e a planilha é lida diretamente
+    pa = None
+    feather = None
+
+try:
+    import fcntl
+except ImportError:  # Sem fcntl (Windows) a sincronização do store não é travada entre processos
+    fcntl = None
+
+# 📂 Origem padrão dos dados
+FILE_PATH = "./datasets/COCA-DADOS.xlsx"
+SHEET_NAME = "COCA"
+
+# 🎯 Colunas necessárias na planilha e seus nomes internos
+COLUNAS_ORIGEM = ["Date_Time", "NO", "Status_NO", "NO2", "Status_NO2", "NOX", "Status_NOX",
+                  "O3", "Status_O3", "CO", "Status_CO", "SO2", "Status_SO2", "PM10", "Status_PM10"]
+COLUNAS = ["date", "NO", "NOflag", "NO2", "NO2flag", "NOX", "NOXflag", "O3", "O3flag",
+           "CO", "COflag", "SO2", "SO2flag", "PM10", "PM10flag"]
+
+# 🗜️ Esquema compacto em memória: medições em float32 e flags (códigos 0–255) em uint8
+TIPO_MEDICAO = "float32"
+TIPO_FLAG = "uint8"
+
+# 📥 Linhas lidas por bloco na leitura em streaming (limita o pico de memória da ingestão)
+LINHAS_BLOCO = 20_000
+
+# Versão do formato do cache; incrementar quando o esquema gravado mudar
+VERSAO_CACHE = 6
+
+# 🗂️ Níveis mantidos junto às partições mensais: médias (ver agregados.py) e índice de flags (ver cobertura.py)
+NIVEIS_AGREGADOS = list(RESOLUCOES) + ["flags_1h", "flags_1d"]
+
+
+class DadosForaDeOrdem(ValueError):
+    """Blocos da planilha fora de ordem cronológica (a leitura em blocos não pode ser usada)."""
+
+
+def ler_planilha(file_path=FILE_PATH, sheet_name=SHEET_NAME, inicio=None, fim=None):
+    """
+    Lê a planilha da estação (ou exportação CSV) e aplica a seleção e renomeação de colunas.
+
+    A leitura é feita em blocos por `ler_blocos`: apenas as colunas
+    necessárias e as linhas dentro de [inicio, fim] são mantidas em memória.
+
+    Parâmetros:
+    - file_path (str): Caminho do arquivo Excel ou CSV.
+    - sheet_name (str): Nome da aba com os dados (ignorado em CSV).
+    - inicio, fim (Timestamp): Período desejado (inclusivo); None = sem limite.
+
+    Retorna:
+    - DataFrame indexado por "date" e ordenado no tempo.
+    """
+    partes = list(ler_blocos(file_path, sheet_name, inicio, fim))
+    if not partes:
+        return _converter_bloco(pd.DataFrame(columns=COLUNAS))
+    df = pd.concat(partes) if len(partes) > 1 else partes[0]
+    # A planilha normalmente já vem em ordem cronológica; só ordena se necessário
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind="stable")
+    return df
+
+
+def ler_blocos(file_path=FILE_PATH, sheet_name=SHEET_NAME, inicio=None, fim=None, linhas_bloco=LINHAS_BLOCO):
+    """
+    Lê a planilha da estação (ou exportação CSV) em blocos de até `linhas_bloco` linhas.
+
+    Planilhas são percorridas linha a linha pelo openpyxl em modo read_only e
+    CSVs pelo leitor em blocos do pandas; em ambos os casos só as colunas de
+    COLUNAS_ORIGEM são convertidas e linhas fora de [inicio, fim] são
+    descartadas antes de o bloco ser devolvido. O pico de memória depende do
+    tamanho do bloco, não do arquivo.
+
+    Parâmetros:
+    - file_path (str): Caminho do arquivo Excel ou CSV.
+    - sheet_name (str): Nome da aba com os dados (ignorado em CSV).
+    - inicio, fim (Timestamp): Período desejado (inclusivo); None = sem limite.
+    - linhas_bloco (int): Linhas por bloco.
+
+    Retorna:
+    - Gerador de DataFrames no formato de `ler_planilha`, na ordem do arquivo
+      (cada bloco é ordenado internamente).
+    """
+    if os.path.splitext(file_path)[1].lower() == ".csv":
+        brutos = _blocos_csv(file_path, linhas_bloco)
+    else:
+        brutos = _blocos_excel(file_path, sheet_name, linhas_bloco)
+
+    for bruto in brutos:
+        bloco = _converter_bloco(bruto)
+        if inicio is not None or fim is not None:
+            i0 = 0 if inicio is None else bloco.index.searchsorted(pd.Timestamp(inicio), side="left")
+            i1 = len(bloco) if fim is None else bloco.index.searchsorted(pd.Timestamp(fim), side="right")
+            bloco = bloco.iloc[i0:i1]
+        if len(bloco):
+            yield bloco
+
+
+def _blocos_excel(file_path, sheet_name, linhas_bloco):
+    import openpyxl  # Já é dependência do pandas para .xlsx; importado apenas quando usado
+
+    livro = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        linhas = livro[sheet_name].iter_rows(values_only=True)
+        cabecalho = list(next(linhas, ()))
+        faltando = [c for c in COLUNAS_ORIGEM if c not in cabecalho]
+        if faltando:
+            raise KeyError(f"Colunas ausentes na aba {sheet_name}: {faltando}")
+        projetar = operator.itemgetter(*[cabecalho.index(c) for c in COLUNAS_ORIGEM])
+        coluna_data = cabecalho.index("Date_Time")
+
+        bloco = []
+        for linha in linhas:
+            # Linhas vazias (ex.: formatação após o fim dos dados) não têm data
+            if linha and linha[coluna_data] is not None:
+                bloco.append(projetar(linha))
+            if len(bloco) >= linhas_bloco:
+                yield pd.DataFrame.from_records(bloco, columns=COLUNAS)
+                bloco = []
+        if bloco:
+            yield pd.DataFrame.from_records(bloco, columns=COLUNAS)
+    finally:
+        livro.close()
+
+
+def _blocos_csv(file_path, linhas_bloco):
+    with pd.read_csv(file_path, usecols=COLUNAS_ORIGEM, chunksize=linhas_bloco) as leitor:
+        for bruto in leitor:
+            bruto = bruto[COLUNAS_ORIGEM]
+            bruto.columns = COLUNAS
+            yield bruto
+
+
+def _converter_bloco(bruto):
+    # Tipos da leitura completa da planilha: datas e medições/flags em float64 (células inválidas viram NaN)
+    colunas = {"date": pd.to_datetime(bruto["date"])}
+    for coluna in COLUNAS[1:]:
+        colunas[coluna] = pd.to_numeric(bruto[coluna], errors="coerce").astype("float64")
+    bloco = pd.DataFrame(colunas).set_index("date")
+    if not bloco.index.is_monotonic_increasing:
+        bloco = bloco.sort_index(kind="stable")
+    return bloco
+
+
+def compactar(df):
+    """
+    Converte os dados da estação para o esquema compacto (float32 / uint8).
+
+    Flags ausentes (NaN) passam a 0, o código de "Dados Ausentes". Colunas de
+    flag com códigos fora de 0–255 ou não inteiros são mantidas como estão.
+
+    Parâmetros:
+    - df (DataFrame): Dados no formato de `ler_planilha`.
+
+    Retorna:
+    - Novo DataFrame com o mesmo índice e colunas.
+    """
+    tipos = {}
+    for coluna in df.columns:
+        if coluna.endswith("flag"):
+            flags = df[coluna].fillna(0).to_numpy()
+            if len(flags) and ((flags < 0) | (flags > 255) | (flags % 1 != 0)).any():
+                continue
+            tipos[coluna] = TIPO_FLAG
+        else:
+            tipos[coluna] = TIPO_MEDICAO
+
+    flags_nulos = {c: 0 for c, tipo in tipos.items() if tipo == TIPO_FLAG}
+    return df.fillna(flags_nulos).astype(tipos)
+
+
+def relatorio_memoria(original, compacto):
+    """
+    Compara o uso de memória de duas versões dos dados (ex.: antes e depois de `compactar`).
+
+    Parâmetros:
+    - original (DataFrame): Dados no esquema original.
+    - compacto (DataFrame): Dados no esquema compacto.
+
+    Retorna:
+    - DataFrame por coluna (incluindo o índice e o total) com tipos, bytes antes/depois e redução (%).
+    """
+    antes = original.memory_usage(index=True, deep=True)
+    depois = compacto.memory_usage(index=True, deep=True)
+    relatorio = pd.DataFrame({"bytes_antes": antes, "bytes_depois": depois})
+    relatorio.insert(0, "tipo_antes", [str(original.index.dtype)] + original.dtypes.astype(str).tolist())
+    relatorio.insert(1, "tipo_depois", [str(compacto.index.dtype)] + compacto.dtypes.astype(str).tolist())
+    relatorio.loc["Total"] = ["", "", antes.sum(), depois.sum()]
+    relatorio["reducao_pct"] = (1 - relatorio["bytes_depois"] / relatorio["bytes_antes"]) * 100
+    return relatorio
+
+
+def _pasta_store(file_path, sheet_name, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), ".cache")
+    base = f"{os.path.splitext(os.path.basename(file_path))[0]}-{sheet_name}"
+    return os.path.join(cache_dir, base)
+
+
+@contextmanager
+def _trava_store(store_dir):
+    # Um escritor por store: painel, processos do serviço de relatórios e estações do CLI em lote
+    # podem sincronizar a mesma planilha ao mesmo tempo (a trava é liberada ao fechar o arquivo)
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, ".trava"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _hash_arquivo(file_path):
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _hash_particao(df):
+    # Hash vetorizado por linha (índice + valores), combinado em um único digest
+    linhas = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return hashlib.sha256(linhas.tobytes()).hexdigest()
+
+
+def _fatias_mensais(df):
+    """Divide um DataFrame ordenado em fatias contíguas por mês (chave "AAAA-MM")."""
+    if df.empty:
+        return
+    meses = pd.date_range(df.index[0].to_period("M").to_timestamp(), df.index[-1], freq="MS")
+    limites = df.index.searchsorted(meses[1:])
+    inicio = 0
+    for mes, fim in zip(meses, list(limites) + [len(df)]):
+        if fim > inicio:
+            yield mes.strftime("%Y-%m"), df.iloc[inicio:fim]
+        inicio = fim
+
+
+def _ler_meta(meta_file):
+    try:
+        with open(meta_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _gravar_meta(meta_file, meta):
+    tmp = f"{meta_file}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_file)
+
+
+def _ler_arrow(arrow_file):
+    # Leitura via memory-map: as colunas são mapeadas do disco sem cópia intermediária
+    tabela = feather.read_table(arrow_file, memory_map=True)
+    return tabela.to_pandas().set_index("date")
+
+
+def _gravar_arrow(df, arrow_file):
+    tmp = f"{arrow_file}.{os.getpid()}.tmp"
+    tabela = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    feather.write_feather(tabela, tmp, compression="uncompressed")
+    os.replace(tmp, arrow_file)
+
+
+def ler_store(store_dir, meta, inicio=None, fim=None):
+    """
+    Lê as partições mensais do store e devolve um único DataFrame.
+
+    Com `inicio` / `fim`, só as partições dos meses que cruzam o período são
+    abertas e o resultado é recortado ao período.
+
+    Parâmetros:
+    - store_dir (str): Pasta do store (ou de um nível de agregados).
+    - meta (dict): Metadados do store (lista de partições).
+    - inicio, fim (Timestamp): Período desejado (inclusivo); None = sem limite.
+
+    Retorna:
+    - DataFrame indexado por "date".
+    """
+    chaves = sorted(meta["particoes"])
+    if inicio is not None:
+        chaves = [c for c in chaves if c >= pd.Timestamp(inicio).strftime("%Y-%m")]
+    if fim is not None:
+        chaves = [c for c in chaves if c <= pd.Timestamp(fim).strftime("%Y-%m")]
+
+    partes = [_ler_arrow(os.path.join(store_dir, chave + ".arrow")) for chave in chaves]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS).set_index("date")
+    df = pd.concat(partes) if len(partes) > 1 else partes[0]
+    if inicio is not None or fim is not None:
+        # Limites exatos, como em `ler_blocos` (o .loc com string incluiria o dia inteiro de `fim`)
+        i0 = 0 if inicio is None else df.index.searchsorted(pd.Timestamp(inicio), side="left")
+        i1 = len(df) if fim is None else df.index.searchsorted(pd.Timestamp(fim), side="right")
+        df = df.iloc[i0:i1]
+    return df
+
+
+def _gravar_agregados(parte, store_dir, chave):
+    # Pirâmide 1 min -> 1 h -> 1 dia e histogramas de flags, recalculados apenas para o mês regravado
+    horario = agregar_horario(parte)
+    flags_horario = histograma_horario(parte)
+    niveis = {
+        "1h": horario,
+        "1d": agregar_diario(horario),
+        "flags_1h": flags_horario,
+        "flags_1d": histograma_diario(flags_horario),
+    }
+    for nivel, agregado in niveis.items():
+        os.makedirs(os.path.join(store_dir, nivel), exist_ok=True)
+        _gravar_arrow(agregado, os.path.join(store_dir, nivel, chave + ".arrow"))
+
+
+def carregar_agregados(resolucao, file_path=FILE_PATH, sheet_name=SHEET_NAME, cache_dir=None):
+    """
+    Lê um nível de agregados mantido junto ao store.
+
+    Deve ser chamada após `carregar_dados`, que mantém o store atualizado.
+
+    Parâmetros:
+    - resolucao (str): Um de NIVEIS_AGREGADOS: médias "1h" / "1d" ou índice de flags "flags_1h" / "flags_1d".
+    - file_path (str): Caminho do arquivo Excel.
+    - sheet_name (str): Nome da aba com os dados.
+    - cache_dir (str): Pasta do cache (padrão: ".cache" ao lado da planilha).
+
+    Retorna:
+    - DataFrame agregado (ver `agregados.agregar_horario` e `cobertura.histograma_horario`)
+      ou None se não houver store.
+    """
+    if feather is None:
+        return None
+    store_dir = _pasta_store(file_path, sheet_name, cache_dir)
+    meta = _ler_meta(os.path.join(store_dir, "meta.json"))
+    if meta is None or meta.get("versao") != VERSAO_CACHE:
+        return None
+    return ler_store(os.path.join(store_dir, resolucao), meta)
+
+
+def carregar_indice_flags(df, file_path=FILE_PATH, sheet_name=SHEET_NAME, cache_dir=None):
+    """
+    Índice de flags (histogramas horário e diário, ver cobertura.py) mantido no store.
+
+    Sem store (ex.: pyarrow ausente), o índice é calculado a partir de `df`.
+
+    Retorna:
+    - Tupla (horario, diario).
+    """
+    horario = carregar_agregados("flags_1h", file_path, sheet_name, cache_dir)
+    diario = carregar_agregados("flags_1d", file_path, sheet_name, cache_dir)
+    if horario is None or diario is None:
+        return montar_indice(df)
+    return horario, diario
+
+
+def atualizar_store(df, store_dir, meta):
+    """
+    Sincroniza o store particionado com uma nova leitura completa da planilha.
+
+    Linhas posteriores à última data já ingerida ("high-water mark") são
+    anexadas às partições do mês correspondente. Para o histórico anterior,
+    cada partição mensal é comparada por hash e só é regravada se alguma
+    linha tiver sido revisada (ex.: flag alterado após validação). Os
+    agregados horários e diários acompanham as partições regravadas.
+
+    Parâmetros:
+    - df (DataFrame): Dados completos e ordenados, no formato de `ler_planilha`.
+    - store_dir (str): Pasta do store.
+    - meta (dict): Metadados atuais do store (modificados in-place).
+
+    Retorna:
+    - Lista com as chaves das partições regravadas.
+    """
+    return sincronizar_store(_fatias_mensais(df), store_dir, meta)
+
+
+def atualizar_store_blocos(blocos, store_dir, meta):
+    """
+    Equivalente a `atualizar_store` a partir dos blocos de `ler_blocos`, sem montar o DataFrame completo.
+
+    Os blocos são reagrupados por mês e cada mês é sincronizado assim que
+    termina; em memória ficam no máximo um mês e um bloco.
+
+    Parâmetros:
+    - blocos (iterable): DataFrames em ordem cronológica (ex.: `ler_blocos(...)`).
+    - store_dir (str): Pasta do store.
+    - meta (dict): Metadados atuais do store (modificados in-place).
+
+    Retorna:
+    - Lista com as chaves das partições regravadas.
+
+    Lança:
+    - DadosForaDeOrdem se os blocos não estiverem em ordem cronológica (o store
+      e `meta` não são alterados, ver `sincronizar_store`).
+    """
+    return sincronizar_store(_meses_de_blocos(blocos), store_dir, meta)
+
+
+def _meses_de_blocos(blocos):
+    # Acumula as fatias de cada mês e entrega o mês ao chegar uma data do mês seguinte
+    chave_atual, partes, ultima = None, [], None
+    for bloco in blocos:
+        if ultima is not None and bloco.index[0] < ultima:
+            raise DadosForaDeOrdem(f"Dados fora de ordem cronológica em {bloco.index[0]}")
+        ultima = bloco.index[-1]
+        for chave, parte in _fatias_mensais(bloco):
+            if chave != chave_atual and partes:
+                yield chave_atual, pd.concat(partes) if len(partes) > 1 else partes[0]
+                partes = []
+            chave_atual = chave
+            partes.append(parte)
+    if partes:
+        yield chave_atual, pd.concat(partes) if len(partes) > 1 else partes[0]
+
+
+def sincronizar_store(meses, store_dir, meta):
+    """
+    Sincroniza o store com os dados completos de cada mês (ver `atualizar_store`).
+
+    As partições regravadas são preparadas em uma pasta temporária e só
+    substituem as atuais quando `meses` termina sem erro: se a leitura falhar
+    no meio (ex.: DadosForaDeOrdem), o store e `meta` permanecem como estavam
+    e leitores nunca abrem um mês incompleto.
+
+    Parâmetros:
+    - meses (iterable): Pares (chave "AAAA-MM", DataFrame do mês) em ordem cronológica.
+    - store_dir (str): Pasta do store.
+    - meta (dict): Metadados atuais do store (modificados in-place).
+
+    Retorna:
+    - Lista com as chaves das partições regravadas.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    particoes = meta.setdefault("particoes", {})
+    ultima = pd.Timestamp(meta["ultima_data"]) if meta.get("ultima_data") else None
+
+    preparo = os.path.join(store_dir, f".preparo-{os.getpid()}")
+    os.makedirs(preparo, exist_ok=True)
+    meses_atuais = set()
+    novas = {}
+    parte = None
+    try:
+        for chave, parte in meses:
+            meses_atuais.add(chave)
+            # ➕ Linhas após o high-water mark ou 🔁 histórico revisado (hash diferente): regrava o mês
+            corte = parte.index.searchsorted(ultima, side="right") if ultima is not None else 0
+            hash_parte = _hash_particao(parte)
+            if corte < len(parte) or particoes.get(chave, {}).get("hash_historico") != hash_parte:
+                _gravar_arrow(parte, os.path.join(preparo, chave + ".arrow"))
+                _gravar_agregados(parte, preparo, chave)
+                novas[chave] = {"hash_historico": hash_parte, "linhas": len(parte)}
+
+        # Leitura completa: troca cada partição (e seus agregados) por renomeação atômica
+        for nivel in [""] + NIVEIS_AGREGADOS:
+            os.makedirs(os.path.join(store_dir, nivel), exist_ok=True)
+            for chave in novas:
+                nome = os.path.join(nivel, chave + ".arrow")
+                os.replace(os.path.join(preparo, nome), os.path.join(store_dir, nome))
+    finally:
+        shutil.rmtree(preparo, ignore_errors=True)
+    particoes.update(novas)
+
+    # Partições que deixaram de existir na planilha (linhas removidas)
+    for chave in [c for c in particoes if c not in meses_atuais]:
+        os.remove(os.path.join(store_dir, chave + ".arrow"))
+        for nivel in NIVEIS_AGREGADOS:
+            os.remove(os.path.join(store_dir, nivel, chave + ".arrow"))
+        del particoes[chave]
+
+    if parte is not None:
+        meta["ultima_data"] = parte.index[-1].isoformat()
+    return list(novas)
+
+
+def versao_dados(file_path=FILE_PATH):
+    """Identificador barato da versão da planilha (tamanho e mtime), usado como chave de cache."""
+    stat = os.stat(file_path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def carregar_dados(file_path=FILE_PATH, sheet_name=SHEET_NAME, cache_dir=None, compacto=False, inicio=None, fim=None):
+    """
+    Carrega os dados da estação através de um store colunar (Arrow IPC) particionado por mês.
+
+    A planilha só é lida novamente quando o arquivo muda: a validação usa
+    tamanho e mtime e, se estes divergirem, o hash SHA-256 do conteúdo.
+    Quando muda, a planilha é lida em blocos (ver `ler_blocos`) e gravada mês
+    a mês no store; apenas as partições com linhas novas ou revisadas são regravadas.
+    A sincronização é serializada entre processos por uma trava no store;
+    a leitura de um store já atualizado não aguarda a trava.
+
+    Parâmetros:
+    - file_path (str): Caminho do arquivo Excel ou CSV.
+    - sheet_name (str): Nome da aba com os dados.
+    - cache_dir (str): Pasta do cache (padrão: ".cache" ao lado da planilha).
+    - compacto (bool): Aplicar o esquema compacto (ver `compactar`) ao resultado.
+    - inicio, fim (Timestamp): Período devolvido (inclusivo); None = todo o histórico.
+      O store continua completo: o período só limita o que é lido dele.
+
+    Retorna:
+    - DataFrame no mesmo formato de `ler_planilha`.
+    """
+    df = _carregar(file_path, sheet_name, cache_dir, inicio, fim)
+    return compactar(df) if compacto else df
+
+
+def _carregar(file_path, sheet_name, cache_dir, inicio=None, fim=None):
+    if feather is None:
+        return ler_planilha(file_path, sheet_name, inicio, fim)
+
+    store_dir = _pasta_store(file_path, sheet_name, cache_dir)
+    meta_file = os.path.join(store_dir, "meta.json")
+    stat = os.stat(file_path)
+    meta = _ler_meta(meta_file)
+    if _assinatura_confere(meta, stat):
+        return ler_store(store_dir, meta, inicio, fim)
+
+    with _trava_store(store_dir):
+        # Relido com a trava: outro processo pode ter sincronizado o store enquanto esta chamada aguardava
+        meta = _ler_meta(meta_file)
+        if meta is None or meta.get("versao") != VERSAO_CACHE:
+            meta = {"versao": VERSAO_CACHE, "particoes": {}}
+        elif meta["tamanho"] == stat.st_size:
+            if meta["mtime_ns"] == stat.st_mtime_ns:
+                return ler_store(store_dir, meta, inicio, fim)
+
+            # mtime alterado sem mudança de conteúdo (cópia, touch): apenas atualiza a assinatura
+            if meta["sha256"] == _hash_arquivo(file_path):
+                meta["mtime_ns"] = stat.st_mtime_ns
+                _gravar_meta(meta_file, meta)
+                return ler_store(store_dir, meta, inicio, fim)
+
+        try:
+            atualizar_store_blocos(ler_blocos(file_path, sheet_name), store_dir, meta)
+        except DadosForaDeOrdem:
+            # Planilha fora de ordem cronológica: leitura completa, ordenada em memória
+            atualizar_store(ler_planilha(file_path, sheet_name), store_dir, meta)
+        meta.update({
+            "tamanho": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": _hash_arquivo(file_path),
+        })
+        _gravar_meta(meta_file, meta)
+        return ler_store(store_dir, meta, inicio, fim)
+
+
+def _assinatura_confere(meta, stat):
+    # Store atual para a planilha (mesma versão do formato, tamanho e mtime): leitura sem trava
+    return (meta is not None and meta.get("versao") == VERSAO_CACHE
+            and meta["tamanho"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns)
@@ -0,0 +1,170 @@
+import contextlib
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import logging
+import pstats
+import time
+import tracemalloc
+
+# 📝 Logger das métricas estruturadas (uma linha JSON por execução)
+logger = logging.getLogger("reportstation.metricas")
+
+# Coleta ativa no contexto atual (None = instrumentação desligada)
+_COLETA = contextvars.ContextVar("coleta", default=None)
+_NULO = contextlib.nullcontext()
+
+# Funções exibidas no resumo do cProfile
+LINHAS_PERFIL = 25
+
+
+class Coleta:
+    """
+    Tempos (e, opcionalmente, perfil e memória) das etapas de uma execução.
+
+    Criada por `iniciar_coleta`; as etapas são registradas por `etapa` e
+    `medido` enquanto a coleta estiver ativa no contexto atual.
+    """
+
+    def __init__(self, perfil=False, memoria=False):
+        self.etapas = []
+        self.inicio = time.perf_counter()
+        self._pilha = []
+        self._token = None
+        self._perfil = cProfile.Profile() if perfil else None
+        self._memoria = memoria and not tracemalloc.is_tracing()
+
+    def tempos(self, nivel=1):
+        """Tempo total (s) por etapa até a profundidade `nivel` (1 = apenas etapas de primeiro nível)."""
+        tempos = {}
+        for registro in self.etapas:
+            if registro["nivel"] <= nivel:
+                tempos[registro["etapa"]] = tempos.get(registro["etapa"], 0.0) + registro["segundos"]
+        return tempos
+
+
+@contextlib.contextmanager
+def _medir(coleta, nome):
+    caminho = "/".join(coleta._pilha + [nome])
+    nivel = len(coleta._pilha) + 1
+    # Pico de memória apenas nas etapas de primeiro nível (o reset afetaria as etapas externas)
+    memoria = coleta._memoria and nivel == 1
+    if memoria:
+        tracemalloc.reset_peak()
+
+    coleta._pilha.append(nome)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        coleta._pilha.pop()
+        registro = {"etapa": caminho, "nivel": nivel, "segundos": segundos}
+        if memoria:
+            registro["memoria_pico_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+        coleta.etapas.append(registro)
+
+
+def etapa(nome):
+    """
+    Context manager que mede uma etapa na coleta ativa.
+
+    Sem coleta ativa, retorna um contexto nulo compartilhado (custo de uma
+    consulta a ContextVar). Etapas aninhadas são registradas como "externa/interna".
+
+    Exemplo:
+        with etapa("graficos"):
+            ...
+    """
+    coleta = _COLETA.get()
+    if coleta is None:
+        return _NULO
+    return _medir(coleta, nome)
+
+
+def medido(nome):
+    """Decorador equivalente a `etapa(nome)` envolvendo a função inteira."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            coleta = _COLETA.get()
+            if coleta is None:
+                return funcao(*args, **kwargs)
+            with _medir(coleta, nome):
+                return funcao(*args, **kwargs)
+        return wrapper
+    return decorador
+
+
+def iniciar_coleta(ativa=True, perfil=False, memoria=False):
+    """
+    Ativa a coleta de métricas no contexto atual (thread ou sessão).
+
+    Parâmetros:
+    - ativa (bool): Se False, desliga a instrumentação no contexto atual e retorna None.
+    - perfil (bool): Capturar também um perfil cProfile da execução.
+    - memoria (bool): Medir o pico de memória (tracemalloc) das etapas de primeiro nível.
+
+    Retorna:
+    - Coleta ativa, ou None.
+    """
+    coleta = Coleta(perfil, memoria) if ativa else None
+    token = _COLETA.set(coleta)
+    if coleta is not None:
+        coleta._token = token
+        if coleta._memoria:
+            tracemalloc.start()
+        if coleta._perfil is not None:
+            coleta._perfil.enable()
+    return coleta
+
+
+def finalizar_coleta(coleta):
+    """
+    Encerra a coleta, restaura a coleta anterior do contexto e resume as métricas.
+
+    Retorna:
+    - Dicionário com "total_s", "etapas" (lista de registros) e "perfil"
+      (texto do pstats ordenado por tempo acumulado, ou None).
+    """
+    total = time.perf_counter() - coleta.inicio
+    texto_perfil = None
+    if coleta._perfil is not None:
+        coleta._perfil.disable()
+        saida = io.StringIO()
+        pstats.Stats(coleta._perfil, stream=saida).sort_stats("cumulative").print_stats(LINHAS_PERFIL)
+        texto_perfil = saida.getvalue()
+    if coleta._memoria:
+        tracemalloc.stop()
+    if coleta._token is not None:
+        _COLETA.reset(coleta._token)
+        coleta._token = None
+
+    return {"total_s": total, "etapas": coleta.etapas, "perfil": texto_perfil}
+
+
+def registrar_metricas(resumo, arquivo=None, **campos):
+    """
+    Emite as métricas de uma execução como uma linha JSON estruturada.
+
+    A linha é enviada ao logger "reportstation.metricas" e, se `arquivo` for
+    informado, anexada a ele (formato JSON Lines).
+
+    Parâmetros:
+    - resumo (dict): Saída de `finalizar_coleta`.
+    - arquivo (str): Arquivo de métricas (.jsonl).
+    - campos: Campos adicionais da linha (ex.: estacao="...").
+    """
+    linha = json.dumps({
+        "momento": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **campos,
+        "total_s": round(resumo["total_s"], 6),
+        "etapas": [{**registro, "segundos": round(registro["segundos"], 6)} for registro in resumo["etapas"]],
+    }, ensure_ascii=False, default=str)
+
+    logger.info(linha)
+    if arquivo:
+        with open(arquivo, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
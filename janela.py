@@ -0,0 +1,67 @@
+import pandas as pd
+
+
+def limites_janela(index, dias=30, intervalo=None):
+    """
+    Início e fim da janela exibida: os últimos `dias` dias ou o `intervalo` informado.
+
+    Parâmetros:
+    - index (DatetimeIndex): Índice temporal ordenado.
+    - dias (int): Tamanho da janela, em dias.
+    - intervalo (tuple): (início, fim) explícito; substitui `dias`.
+
+    Retorna:
+    - Tupla (início, fim) em Timestamp.
+    """
+    if intervalo is not None:
+        return pd.Timestamp(intervalo[0]), pd.Timestamp(intervalo[1])
+    ultima_data = index.max()
+    return ultima_data - pd.Timedelta(days=dias), ultima_data
+
+
+def colunas_janela(df, colunas, inicio, fim):
+    """
+    Fatia [início, fim] de colunas de um DataFrame como arrays somente leitura.
+
+    A janela é localizada por busca binária no índice ordenado e cada coluna é
+    devolvida como uma visão do bloco de dados do DataFrame (sem cópia quando o
+    tipo já é homogêneo). O DataFrame de origem nunca é alterado.
+
+    Parâmetros:
+    - df (DataFrame): Dados com índice temporal ordenado.
+    - colunas (list): Colunas desejadas.
+    - inicio, fim (Timestamp): Limites da janela (inclusivos).
+
+    Retorna:
+    - Tupla (index, [arrays na ordem de `colunas`]).
+    """
+    index = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(df.index)
+    i0 = index.searchsorted(inicio, side="left")
+    i1 = index.searchsorted(fim, side="right")
+
+    arrays = []
+    for coluna in colunas:
+        array = df[coluna].to_numpy()[i0:i1]
+        if array.flags.writeable:
+            array = array.view()
+            array.flags.writeable = False
+        arrays.append(array)
+    return index[i0:i1], arrays
+
+
+def janela_parametro(df, parametro, dias=30, intervalo=None):
+    """
+    Visões somente leitura do índice, dos valores e dos flags de um parâmetro na janela exibida.
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação com índice temporal ordenado.
+    - parametro (str): Nome do parâmetro (a coluna de flag é `parametro + "flag"`).
+    - dias (int): Tamanho da janela, em dias.
+    - intervalo (tuple): (início, fim) explícito; substitui `dias`.
+
+    Retorna:
+    - Tupla (index, valores, flags).
+    """
+    inicio, fim = limites_janela(df.index, dias, intervalo)
+    index, (valores, flags) = colunas_janela(df, [parametro, parametro + "flag"], inicio, fim)
+    return index, valores, flags
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import numba
+except ImportError:  # Sem numba as janelas são calculadas com somas acumuladas do NumPy
+    numba = None
+
+# ⏱️ Uma hora em nanossegundos (tempos em epoch int64)
+HORA_NS = pd.Timedelta(hours=1).value
+
+
+def epoch_ns(index):
+    """Converte um índice temporal em inteiros int64 (nanossegundos desde 1970)."""
+    return np.asarray(index, dtype="datetime64[ns]").view("int64")
+
+
+def medias_horarias(tempos, valores, minimo_amostras=1):
+    """
+    Médias horárias (hora cheia) de todas as colunas em uma única passagem.
+
+    Parâmetros:
+    - tempos (ndarray int64): Tempos ordenados, em ns (ver `epoch_ns`).
+    - valores (ndarray): Matriz n x k (NaN = dado ausente) ou vetor.
+    - minimo_amostras (int): Amostras válidas necessárias para que a hora seja válida.
+
+    Retorna:
+    - Tupla (início de cada hora com dados, em ns; médias com NaN nas horas inválidas).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    if len(tempos) == 0:
+        return tempos[:0], valores[:0]
+
+    horas = tempos // HORA_NS * HORA_NS
+    inicios = np.flatnonzero(np.r_[True, horas[1:] != horas[:-1]])
+    validos = ~np.isnan(valores)
+    somas = np.add.reduceat(np.where(validos, valores, 0.0), inicios, axis=0)
+    contagens = np.add.reduceat(validos.astype(np.int64), inicios, axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = somas / contagens
+    medias[contagens < max(minimo_amostras, 1)] = np.nan
+    return horas[inicios], medias
+
+
+def media_movel(tempos, valores, largura, minimo=1):
+    """
+    Média móvel por tempo, equivalente a `rolling(largura, min_periods=minimo).mean()` do pandas.
+
+    A janela de cada ponto é (t - largura, t]. Todas as colunas são
+    calculadas juntas: com numba, por dois ponteiros que percorrem os tempos
+    uma única vez (O(n)); sem numba, com somas acumuladas e busca binária do
+    início de cada janela, vetorizadas no NumPy.
+
+    Parâmetros:
+    - tempos (ndarray int64): Tempos ordenados, em ns (ver `epoch_ns`).
+    - valores (ndarray): Matriz n x k (NaN = dado ausente) ou vetor.
+    - largura (int): Largura da janela, em ns.
+    - minimo (int): Valores não nulos necessários na janela.
+
+    Retorna:
+    - Médias no formato de `valores` (NaN onde a janela não tem o mínimo).
+    """
+    valores = np.asarray(valores, dtype=np.float64)
+    vetor = valores.ndim == 1
+    matriz = valores[:, None] if vetor else valores
+    tempos = np.ascontiguousarray(tempos, dtype=np.int64)
+    minimo = max(int(minimo), 1)
+
+    if numba is not None:
+        medias = _media_movel_numba(tempos, np.ascontiguousarray(matriz), int(largura), minimo)
+    else:
+        medias = _media_movel_numpy(tempos, matriz, int(largura), minimo)
+    return medias[:, 0] if vetor else medias
+
+
+def _media_movel_numpy(tempos, matriz, largura, minimo):
+    n = len(tempos)
+    inicios = np.searchsorted(tempos, tempos - largura, side="right")
+    validos = ~np.isnan(matriz)
+
+    # Somas e contagens acumuladas com uma linha de zeros no início: janela [i0, i] = acumulado[i + 1] - acumulado[i0]
+    somas = np.zeros((n + 1, matriz.shape[1]))
+    np.cumsum(np.where(validos, matriz, 0.0), axis=0, out=somas[1:])
+    contagens = np.zeros((n + 1, matriz.shape[1]), dtype=np.int64)
+    np.cumsum(validos, axis=0, out=contagens[1:])
+
+    contagem = contagens[1:] - contagens[inicios]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = (somas[1:] - somas[inicios]) / contagem
+    medias[contagem < minimo] = np.nan
+    return medias
+
+
+def _media_movel_ponteiros(tempos, matriz, largura, minimo):
+    n, k = matriz.shape
+    medias = np.full((n, k), np.nan)
+    somas = np.zeros(k)
+    contagens = np.zeros(k, dtype=np.int64)
+    inicio = 0
+    for i in range(n):
+        # Entra o ponto i, saem os pontos fora de (t - largura, t]
+        for j in range(k):
+            if not np.isnan(matriz[i, j]):
+                somas[j] += matriz[i, j]
+                contagens[j] += 1
+        while tempos[inicio] <= tempos[i] - largura:
+            for j in range(k):
+                if not np.isnan(matriz[inicio, j]):
+                    somas[j] -= matriz[inicio, j]
+                    contagens[j] -= 1
+                    if contagens[j] == 0:
+                        somas[j] = 0.0  # Descarta o erro de arredondamento acumulado
+            inicio += 1
+        for j in range(k):
+            if contagens[j] >= minimo:
+                medias[i, j] = somas[j] / contagens[j]
+    return medias
+
+
+# Compilado pelo numba quando disponível; a versão em Python puro é a referência do kernel
+_media_movel_numba = numba.njit(cache=True)(_media_movel_ponteiros) if numba is not None else None
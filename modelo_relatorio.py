@@ -0,0 +1,95 @@
+import os
+from functools import lru_cache
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+# 📂 Templates do relatório e cache de bytecode compilado
+PASTA_TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+PASTA_BYTECODE = os.path.join(".cache", "jinja")
+
+
+def montar_modelo(nome_estacao, ultima_data, inicio, mensagens_conama, ocorrencias, graficos=None,
+                  cobertura=None):
+    """
+    Monta o modelo estruturado do relatório, compartilhado pelo HTML/PDF e pelo painel.
+
+    Parâmetros:
+    - nome_estacao (str): Nome da estação monitorada.
+    - ultima_data (Timestamp): Data mais recente dos dados.
+    - inicio (Timestamp): Início do período do relatório.
+    - mensagens_conama (list): Mensagens de ultrapassagem dos padrões CONAMA.
+    - ocorrencias (list): Mensagens de ocorrências (QA).
+    - graficos (dict): {parâmetro: endereço da imagem}, na ordem de exibição.
+    - cobertura (DataFrame): Tabela de `cobertura.cobertura` do período.
+
+    Retorna:
+    - Dicionário com "cabecalho", "conama", "ocorrencias", "graficos" e "cobertura".
+    """
+    return {
+        "cabecalho": {
+            "data": ultima_data.strftime('%d/%m/%Y'),
+            "inicio": inicio.strftime('%d/%m/%Y'),
+            "fim": ultima_data.strftime('%d/%m/%Y'),
+            "estacao": nome_estacao,
+        },
+        "conama": list(mensagens_conama),
+        "ocorrencias": list(ocorrencias),
+        "graficos": montar_modelo_graficos(graficos or {}),
+        "cobertura": montar_modelo_cobertura(cobertura),
+    }
+
+
+def montar_modelo_graficos(graficos):
+    """Lista de gráficos do modelo a partir de {parâmetro: endereço da imagem}."""
+    return [{"parametro": param, "src": src} for param, src in graficos.items()]
+
+
+def montar_modelo_cobertura(tabela):
+    """Tabela de cobertura do modelo: cabeçalho das condições e uma linha (%) por parâmetro."""
+    if tabela is None:
+        return None
+    condicoes = [coluna for coluna in tabela.columns if coluna != "esperadas"]
+    return {
+        "condicoes": condicoes,
+        "linhas": [{"parametro": param, "valores": [f"{linha[c]:.1f}%" for c in condicoes]}
+                   for param, linha in tabela.iterrows()],
+    }
+
+
+@lru_cache(maxsize=1)
+def _ambiente():
+    # Templates compilados uma vez por processo; o bytecode fica em disco entre execuções
+    os.makedirs(PASTA_BYTECODE, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(PASTA_TEMPLATES),
+        bytecode_cache=FileSystemBytecodeCache(PASTA_BYTECODE),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+    )
+
+
+@lru_cache(maxsize=1)
+def estilo_relatorio():
+    """Conteúdo da folha de estilo do relatório (templates/relatorio.css)."""
+    with open(os.path.join(PASTA_TEMPLATES, "relatorio.css"), encoding="utf-8") as f:
+        return f.read()
+
+
+def renderizar(template, modelo, destino=None, **extras):
+    """
+    Renderiza um template com o modelo do relatório.
+
+    Parâmetros:
+    - template (str): Nome do template em templates/ (ex.: "relatorio.html").
+    - modelo (dict): Saída de `montar_modelo`.
+    - destino (str ou arquivo): Caminho ou buffer de texto; se informado, a saída
+      é gravada em fluxo (sem montar a string inteira em memória).
+    - extras: Variáveis adicionais do template (ex.: estilo).
+
+    Retorna:
+    - HTML gerado (str), ou None quando gravado em `destino`.
+    """
+    tmpl = _ambiente().get_template(template)
+    if destino is None:
+        return tmpl.render(**modelo, **extras)
+    tmpl.stream(**modelo, **extras).dump(destino, encoding="utf-8" if isinstance(destino, str) else None)
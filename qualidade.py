@@ -0,0 +1,118 @@
+import numpy as np
+
+from consistencia_nox import PISO_ABSOLUTO, avaliar_consistencia_nox
+from episodios import TOLERANCIA_EPISODIO, agrupar_episodios
+
+# 🧪 Parâmetros monitorados pela estação
+PARAMETROS = ["NO", "NO2", "NOX", "O3", "CO", "SO2", "PM10"]
+
+# ⚠️ Regras de ocorrência (QA) definidas como dados
+# - tipo: "abaixo" / "acima" comparam o parâmetro com o limite;
+#         "margem_no2" compara NO2 com NOX - NO usando o limite como margem relativa
+#         e "piso" (ppb) como tolerância mínima (ver consistencia_nox.py).
+# - flags: códigos de flag em que a regra é avaliada (None = todos); em "margem_no2"
+#          os flags de NO, NO2 e NOX são verificados, como em `avaliar_consistencia_nox`.
+REGRAS_OCORRENCIAS = [
+    {"parametro": "NO", "tipo": "abaixo", "limite": 0, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "NO2", "tipo": "abaixo", "limite": 0, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "NOX", "tipo": "abaixo", "limite": 0, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "O3", "tipo": "abaixo", "limite": 0, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "CO", "tipo": "abaixo", "limite": 0, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "SO2", "tipo": "abaixo", "limite": 0, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "PM10", "tipo": "abaixo", "limite": -2, "flags": None, "mensagem": "{parametro} abaixo de {limite}"},
+    {"parametro": "NO2", "tipo": "margem_no2", "limite": 0.1, "piso": PISO_ABSOLUTO, "flags": (1,),
+     "mensagem": "NO2 fora da margem de {limite:.0%} (mín. {piso:g} ppb) de NOX - NO"},
+]
+
+
+def filtrar_por_flags(df, flags_aceitos, parametros=PARAMETROS):
+    """
+    Mantém apenas as linhas em que todos os parâmetros têm flag em `flags_aceitos`.
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação.
+    - flags_aceitos (list): Códigos de flag aceitos (ex.: [1] ou [1, 4]).
+    - parametros (list): Parâmetros cujos flags são verificados.
+
+    Retorna:
+    - DataFrame filtrado.
+    """
+    matriz = df[[p + "flag" for p in parametros]].to_numpy()
+    return df[np.isin(matriz, flags_aceitos).all(axis=1)]
+
+
+def _mascara_regra(df, regra):
+    parametro = regra["parametro"]
+    valores = df[parametro].to_numpy()
+
+    if regra["tipo"] == "abaixo":
+        mascara = valores < regra["limite"]
+    elif regra["tipo"] == "acima":
+        mascara = valores > regra["limite"]
+    else:
+        raise ValueError(f"Tipo de regra desconhecido: {regra['tipo']}")
+
+    if regra.get("flags") is not None:
+        mascara &= np.isin(df[parametro + "flag"].to_numpy(), regra["flags"])
+    return mascara
+
+
+def _episodios_regra(df, regra, tolerancia, consistencia):
+    if regra["tipo"] != "margem_no2":
+        return agrupar_episodios(_mascara_regra(df, regra), df.index, tolerancia)
+
+    # Consistência NOx: episódios de `avaliar_consistencia_nox`, reaproveitados se já calculados com a mesma configuração
+    configuracao = (regra["limite"], regra.get("piso", 0), regra.get("flags"), tolerancia)
+    if consistencia is None or consistencia["configuracao"] != configuracao:
+        consistencia = avaliar_consistencia_nox(df, *configuracao)
+    return [(ep["inicio"], ep["fim"], ep["amostras"]) for ep in consistencia["episodios"]]
+
+
+def avaliar_regras(df, regras=REGRAS_OCORRENCIAS, tolerancia=TOLERANCIA_EPISODIO, consistencia=None):
+    """
+    Avalia as regras de QA sobre colunas inteiras e agrupa as violações em episódios.
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação (índice temporal ordenado).
+    - regras (list): Regras no formato de REGRAS_OCORRENCIAS.
+    - tolerancia (Timedelta): Maior intervalo entre amostras de um mesmo episódio.
+    - consistencia (dict): Resultado de `avaliar_consistencia_nox` já calculado para `df`
+      (opcional); reaproveitado pela regra "margem_no2" quando a configuração coincide.
+
+    Retorna:
+    - Lista de episódios (dict com parametro, mensagem, inicio, fim e amostras).
+    """
+    episodios = []
+    for regra in regras:
+        mensagem = regra["mensagem"].format(**regra)
+        for inicio, fim, amostras in _episodios_regra(df, regra, tolerancia, consistencia):
+            episodios.append({
+                "parametro": regra["parametro"],
+                "mensagem": mensagem,
+                "inicio": inicio,
+                "fim": fim,
+                "amostras": amostras,
+            })
+    return episodios
+
+
+def formatar_ocorrencias(episodios, prefixo=""):
+    """
+    Gera uma mensagem por episódio (ex.: "NO2 abaixo de 0 de 17/03/25 03:10 a 17/03/25 05:40").
+
+    Parâmetros:
+    - episodios (list): Saída de `avaliar_regras`.
+    - prefixo (str): Texto adicionado ao início de cada mensagem (ex.: "⚠️ ").
+
+    Retorna:
+    - Lista de mensagens.
+    """
+    mensagens = []
+    for ep in episodios:
+        inicio = ep["inicio"].strftime('%d/%m/%y %H:%M')
+        if ep["amostras"] == 1:
+            mensagens.append(f"{prefixo}{ep['mensagem']} em {inicio}")
+        else:
+            fim = ep["fim"].strftime('%d/%m/%y %H:%M')
+            mensagens.append(f"{prefixo}{ep['mensagem']} de {inicio} a {fim}")
+    return mensagens
@@ -0,0 +1,77 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from graficos_static import renderizar_grafico_bytes
+from janela import colunas_janela, limites_janela
+
+# Janela exibida nos gráficos do relatório
+DIAS_GRAFICO = 30
+
+
+def _gravar_colunas(df, params, pasta, inicio, fim):
+    # Cada coluna vira um arquivo .npy que os processos abrem via memory-map
+    colunas = [coluna for param in params for coluna in (param, param + "flag")]
+    index, arrays = colunas_janela(df, colunas, inicio, fim)
+    np.save(os.path.join(pasta, "date.npy"), index.to_numpy(dtype="datetime64[ns]"))
+    for coluna, array in zip(colunas, arrays):
+        np.save(os.path.join(pasta, f"{coluna}.npy"), array)
+
+
+def _renderizar_parametro(args):
+    parametro, pasta, formato = args
+    index = pd.DatetimeIndex(np.load(os.path.join(pasta, "date.npy"), mmap_mode="r"))
+    valores = np.load(os.path.join(pasta, f"{parametro}.npy"), mmap_mode="r")
+    flags = np.load(os.path.join(pasta, f"{parametro}flag.npy"), mmap_mode="r")
+    return renderizar_grafico_bytes(parametro, index, valores, flags, estilo="relatorio", formato=formato)
+
+
+def renderizar_graficos(df, params, max_workers=None, formato="png"):
+    """
+    Renderiza em memória os gráficos de flag dos parâmetros, um processo por gráfico.
+
+    Apenas a janela exibida das colunas de cada parâmetro (valor e flag) é
+    gravada em arquivos .npy temporários; os processos abrem esses arquivos
+    via memory-map em vez de receber o DataFrame serializado.
+
+    Parâmetros:
+    - df (DataFrame): Dados da estação com índice temporal ordenado.
+    - params (list): Parâmetros a renderizar.
+    - max_workers (int): Número de processos (1 = renderização sequencial no processo atual).
+    - formato (str): Formato das imagens ("png" ou "svg").
+
+    Retorna:
+    - Dicionário {parâmetro: bytes da imagem}.
+    """
+    inicio, fim = limites_janela(df.index, DIAS_GRAFICO)
+
+    with tempfile.TemporaryDirectory(prefix="graficos-") as pasta:
+        _gravar_colunas(df, params, pasta, inicio, fim)
+        tarefas = [(param, pasta, formato) for param in params]
+
+        if max_workers == 1:
+            imagens = [_renderizar_parametro(tarefa) for tarefa in tarefas]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers or min(len(params), os.cpu_count() or 1)) as executor:
+                imagens = list(executor.map(_renderizar_parametro, tarefas))
+
+    return dict(zip(params, imagens))
+
+
+def gravar_graficos(imagens, destino, formato="png"):
+    """
+    Grava as imagens geradas por `renderizar_graficos` em `destino`.
+
+    Retorna:
+    - Dicionário {parâmetro: caminho do arquivo}.
+    """
+    os.makedirs(destino, exist_ok=True)
+    arquivos = {}
+    for param, imagem in imagens.items():
+        arquivos[param] = os.path.join(destino, f"{param}.{formato}")
+        with open(arquivos[param], "wb") as f:
+            f.write(imagem)
+    return arquivos
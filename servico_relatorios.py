@@ -0,0 +1,326 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from atualizacao import ServicoAtualizacao
+from gerar_relatorio import ESTACAO_PADRAO, _slug, gerar_relatorio
+from ingestao import versao_dados
+from instrumentacao import registrar_metricas
+from qualidade import PARAMETROS
+
+# 🌐 Endereço padrão do serviço (o painel usa RELATORIOS_URL quando definida)
+HOST = "127.0.0.1"
+PORTA = 8765
+URL_SERVICO = os.environ.get("RELATORIOS_URL", f"http://{HOST}:{PORTA}")
+
+# 📂 Pasta base dos relatórios gerados pelo serviço (uma subpasta por estação e pedido)
+PASTA_SAIDA = os.path.join("relatorios", "servico")
+
+# Processos de trabalho padrão e latências mantidas para as métricas
+WORKERS = 2
+AMOSTRAS_LATENCIA = 500
+
+# Formatos aceitos: "pdf" (apenas o PDF) ou "html" (HTML e imagens, sem WeasyPrint)
+FORMATOS = ("pdf", "html")
+
+logger = logging.getLogger("reportstation.servico")
+
+# 🔥 Estado de cada processo de trabalho: dados das estações mantidos em memória entre pedidos
+_DADOS = {}
+
+
+def _dados_estacao(arquivo, aba):
+    # O instantâneo só é reingerido quando a planilha muda (tamanho/mtime), como no painel
+    servico = _DADOS.get((arquivo, aba))
+    if servico is None:
+        servico = _DADOS[(arquivo, aba)] = ServicoAtualizacao(arquivo, aba)
+    servico.verificar()
+    return servico.ultimo().df
+
+
+def _aquecer(estacoes):
+    """Inicializador dos processos: importa as bibliotecas pesadas e carrega os dados das estações."""
+    import matplotlib.dates  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+    try:
+        from gerar_relatorio import _folha_estilo
+        _folha_estilo()  # Importa o WeasyPrint e analisa a folha de estilo uma única vez
+    except (ImportError, OSError) as erro:  # Sem WeasyPrint o processo ainda atende pedidos "html"
+        logger.warning("WeasyPrint indisponível nos processos de trabalho: %s", erro)
+
+    for estacao in estacoes:
+        try:
+            _dados_estacao(os.path.abspath(estacao["arquivo"]), estacao["aba"])
+        except Exception as erro:  # A estação é carregada novamente no primeiro pedido
+            logger.warning("Falha ao pré-carregar %s: %s", estacao["arquivo"], erro)
+
+
+def _processo_pronto():
+    return os.getpid()
+
+
+def _executar_pedido(pedido):
+    """Gera o relatório de um pedido normalizado (executado nos processos de trabalho)."""
+    estacao = dict(pedido)
+    formato = estacao.pop("formato")
+    df = _dados_estacao(estacao["arquivo"], estacao["aba"])
+    return gerar_relatorio(estacao, max_workers_graficos=1, gravar_intermediarios=formato == "html",
+                           pdf=formato == "pdf", df=df)
+
+
+class ServicoRelatorios:
+    """
+    Fila de pedidos de relatório atendida por processos de trabalho pré-aquecidos.
+
+    Cada processo importa pandas, matplotlib e WeasyPrint uma única vez e
+    mantém os dados das estações em memória (reingeridos apenas quando a
+    planilha muda). Pedidos idênticos em andamento são atendidos pela mesma
+    execução.
+
+    Parâmetros:
+    - workers (int): Número de processos de trabalho.
+    - estacoes (list): Estações (formato de ESTACAO_PADRAO) pré-carregadas em cada processo.
+    - pasta_saida (str): Pasta base dos relatórios gerados.
+    - arquivo_metricas (str): Arquivo JSON Lines onde anexar as métricas de cada relatório.
+    """
+
+    def __init__(self, workers=WORKERS, estacoes=(), pasta_saida=PASTA_SAIDA, arquivo_metricas=None):
+        self.workers = workers
+        self.pasta_saida = os.path.abspath(pasta_saida)
+        self.arquivo_metricas = arquivo_metricas
+        self._executor = ProcessPoolExecutor(workers, initializer=_aquecer, initargs=(list(estacoes),))
+        self._lock = threading.Lock()
+        self._em_andamento = {}
+        self._latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self._contadores = {"recebidos": 0, "deduplicados": 0, "concluidos": 0, "falhas": 0}
+
+    def aquecer(self):
+        """Inicia os processos de trabalho e aguarda um pedido de aquecimento por processo."""
+        wait([self._executor.submit(_processo_pronto) for _ in range(self.workers)])
+        return self
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def normalizar(self, pedido):
+        """
+        Valida um pedido e completa os campos ausentes com ESTACAO_PADRAO.
+
+        Parâmetros:
+        - pedido (dict): "estacao", "arquivo", "aba", "dias", "parametros",
+          "formato_graficos" e "formato" ("pdf" ou "html"); todos opcionais.
+
+        Retorna:
+        - Tupla (pedido normalizado, chave de deduplicação). A chave inclui a
+          versão da planilha, pois a janela de "dias" é contada a partir do
+          último dado: o mesmo pedido com dados novos vai para outra pasta.
+        """
+        campos = ("estacao", "arquivo", "aba", "dias", "parametros", "formato_graficos")
+        desconhecidos = set(pedido) - set(campos) - {"formato"}
+        if desconhecidos:
+            raise ValueError(f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+        normalizado = {campo: pedido.get(campo, ESTACAO_PADRAO[campo]) for campo in campos}
+        normalizado["arquivo"] = os.path.abspath(normalizado["arquivo"])
+        normalizado["formato"] = pedido.get("formato", "pdf")
+        if normalizado["formato"] not in FORMATOS:
+            raise ValueError(f"Formato inválido: {normalizado['formato']} (use {' ou '.join(FORMATOS)})")
+        if not isinstance(normalizado["dias"], int) or normalizado["dias"] < 1:
+            raise ValueError(f"Janela inválida: {normalizado['dias']} (dias inteiros a partir de 1)")
+        invalidos = [p for p in normalizado["parametros"] if p not in PARAMETROS]
+        if invalidos:
+            raise ValueError(f"Parâmetros desconhecidos: {', '.join(invalidos)}")
+
+        try:
+            versao = versao_dados(normalizado["arquivo"])
+        except OSError as erro:
+            raise ValueError(f"Arquivo indisponível: {normalizado['arquivo']} ({erro.strerror})")
+
+        chave = hashlib.sha256(json.dumps({**normalizado, "versao": versao}, sort_keys=True).encode()).hexdigest()
+        normalizado["saida"] = os.path.join(self.pasta_saida, _slug(normalizado["estacao"]), chave[:12])
+        return normalizado, chave
+
+    def solicitar(self, pedido):
+        """
+        Enfileira um pedido (ou se junta a um idêntico em andamento) e aguarda o relatório.
+
+        Retorna:
+        - Dicionário com a estação, os arquivos gerados, os tempos por etapa e a latência do pedido (s).
+        """
+        pedido, chave = self.normalizar(pedido)
+        inicio = time.perf_counter()
+        with self._lock:
+            self._contadores["recebidos"] += 1
+            futuro = self._em_andamento.get(chave)
+            novo = futuro is None
+            if novo:
+                futuro = self._em_andamento[chave] = self._executor.submit(_executar_pedido, pedido)
+            else:
+                self._contadores["deduplicados"] += 1
+        if novo:
+            # Fora do lock: se o futuro já terminou, o callback é executado imediatamente nesta thread
+            futuro.add_done_callback(lambda f: self._concluir(chave, f))
+
+        resultado = futuro.result()
+        latencia = time.perf_counter() - inicio
+        with self._lock:
+            self._latencias.append(latencia)
+        return {"estacao": resultado["estacao"], "pdf": resultado["pdf"], "html": resultado["html"],
+                "tempos": resultado["tempos"], "latencia_s": latencia}
+
+    def _concluir(self, chave, futuro):
+        falhou = futuro.cancelled() or futuro.exception() is not None
+        with self._lock:
+            self._em_andamento.pop(chave, None)
+            self._contadores["falhas" if falhou else "concluidos"] += 1
+        if not falhou:
+            resultado = futuro.result()
+            registrar_metricas(resultado["metricas"], self.arquivo_metricas, estacao=resultado["estacao"],
+                               pdf=resultado["pdf"])
+
+    def metricas(self):
+        """
+        Métricas do serviço.
+
+        Retorna:
+        - Dicionário com os contadores, "em_andamento" (pedidos distintos em
+          execução ou na fila), "fila" (aguardando um processo livre) e
+          "latencia_s" (média, p50, p95 e máxima dos últimos AMOSTRAS_LATENCIA pedidos).
+        """
+        with self._lock:
+            em_andamento = len(self._em_andamento)
+            latencias = sorted(self._latencias)
+            contadores = dict(self._contadores)
+
+        latencia = None
+        if latencias:
+            latencia = {
+                "media": sum(latencias) / len(latencias),
+                "p50": latencias[len(latencias) // 2],
+                "p95": latencias[min(int(len(latencias) * 0.95), len(latencias) - 1)],
+                "max": latencias[-1],
+            }
+        return {**contadores, "workers": self.workers, "em_andamento": em_andamento,
+                "fila": max(em_andamento - self.workers, 0), "latencia_s": latencia}
+
+
+def _criar_handler(servico):
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == "/metricas":
+                self._responder(200, servico.metricas())
+            elif self.path == "/saude":
+                self._responder(200, {"ok": True})
+            else:
+                self._responder(404, {"erro": f"Rota desconhecida: {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/relatorios":
+                self._responder(404, {"erro": f"Rota desconhecida: {self.path}"})
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+                pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+                if not isinstance(pedido, dict):
+                    raise ValueError("O pedido deve ser um objeto JSON")
+            except ValueError as erro:
+                self._responder(400, {"erro": str(erro)})
+                return
+
+            try:
+                servico.normalizar(pedido)
+            except (ValueError, TypeError) as erro:
+                self._responder(400, {"erro": str(erro)})
+                return
+
+            try:
+                self._responder(200, servico.solicitar(pedido))
+            except Exception as erro:
+                logger.exception("Falha ao gerar relatório")
+                self._responder(500, {"erro": f"{type(erro).__name__}: {erro}"})
+
+        def log_message(self, formato, *args):
+            logger.info("%s - %s", self.address_string(), formato % args)
+
+    return Handler
+
+
+def solicitar_relatorio(pedido, url=URL_SERVICO, timeout=300):
+    """
+    Cliente do serviço: envia um pedido de relatório e aguarda a resposta.
+
+    Parâmetros:
+    - pedido (dict): Pedido no formato de `ServicoRelatorios.normalizar`.
+    - url (str): Endereço do serviço.
+    - timeout (float): Tempo máximo de espera, em segundos.
+
+    Retorna:
+    - Resposta do serviço (ver `ServicoRelatorios.solicitar`).
+
+    Lança:
+    - urllib.error.URLError se o serviço estiver indisponível ou recusar o pedido
+      (HTTPError traz a mensagem de erro do serviço).
+    """
+    requisicao = urllib.request.Request(f"{url}/relatorios", data=json.dumps(pedido).encode(),
+                                        headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(requisicao, timeout=timeout) as resposta:
+        return json.load(resposta)
+
+
+def main(argv=None):
+    """
+    Ponto de entrada da linha de comando: inicia o serviço HTTP de relatórios.
+
+    Rotas:
+    - POST /relatorios: gera um relatório (corpo JSON, ver `ServicoRelatorios.normalizar`).
+    - GET /metricas: contadores, profundidade da fila e latências.
+    - GET /saude: verificação de disponibilidade.
+    """
+    parser = argparse.ArgumentParser(description="Serviço local de relatórios com processos pré-aquecidos.")
+    parser.add_argument("--host", default=HOST, help="Endereço de escuta")
+    parser.add_argument("--porta", type=int, default=PORTA, help="Porta de escuta")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Processos de trabalho")
+    parser.add_argument("--config", help="Arquivo JSON com as estações pré-carregadas (formato do gerar_relatorio.py)")
+    parser.add_argument("--saida", default=PASTA_SAIDA, help="Pasta base dos relatórios gerados")
+    parser.add_argument("--metricas", help="Arquivo JSON Lines onde anexar as métricas de cada relatório")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    estacoes = [ESTACAO_PADRAO]
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            estacoes = [{**ESTACAO_PADRAO, **e} for e in json.load(f)]
+
+    servico = ServicoRelatorios(args.workers, estacoes, args.saida, args.metricas)
+    print(f"🔥 Aquecendo {args.workers} processo(s)...")
+    servico.aquecer()
+
+    servidor = ThreadingHTTPServer((args.host, args.porta), _criar_handler(servico))
+    print(f"📄 Serviço de relatórios em http://{args.host}:{args.porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import janelas_moveis
+from conama import AMOSTRAS_MINIMAS_HORA, JANELAS, medias_moveis
+from janelas_moveis import epoch_ns, media_movel, medias_horarias
+
+# Kernels verificados: NumPy, dois ponteiros em Python puro (o código compilado pelo numba) e o numba, se instalado
+KERNELS = [janelas_moveis._media_movel_numpy, janelas_moveis._media_movel_ponteiros]
+if janelas_moveis.numba is not None:
+    KERNELS.append(janelas_moveis._media_movel_numba)
+
+ESPECIFICACOES = [("1h", 1), ("8h", 6), ("24h", 18)]
+
+
+def _dados_irregulares(n=3000, colunas=3, fracao=0.5, nulos=0.1, seed=0):
+    # Amostras de 1 minuto com linhas removidas (como em valid_data) e valores ausentes
+    rng = np.random.default_rng(seed)
+    total = int(n / fracao)
+    index = pd.date_range("2025-01-01", periods=total, freq="1min")[np.sort(rng.choice(total, n, replace=False))]
+    valores = rng.normal(50, 15, (n, colunas))
+    valores[rng.random((n, colunas)) < nulos] = np.nan
+    return pd.DataFrame(valores, index=index, columns=[f"p{i}" for i in range(colunas)])
+
+
+@pytest.mark.parametrize("kernel", KERNELS, ids=lambda k: k.__name__)
+@pytest.mark.parametrize("janela,minimo", ESPECIFICACOES)
+def test_kernel_igual_ao_rolling_do_pandas(kernel, janela, minimo):
+    df = _dados_irregulares()
+    esperado = df.rolling(janela, min_periods=minimo).mean().to_numpy()
+
+    obtido = kernel(epoch_ns(df.index), df.to_numpy(), pd.Timedelta(janela).value, minimo)
+    np.testing.assert_allclose(obtido, esperado, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("kernel", KERNELS, ids=lambda k: k.__name__)
+def test_kernel_coluna_toda_nan(kernel):
+    df = _dados_irregulares(n=500)
+    df["p1"] = np.nan
+    esperado = df.rolling("8h", min_periods=6).mean().to_numpy()
+
+    obtido = kernel(epoch_ns(df.index), df.to_numpy(), pd.Timedelta("8h").value, 6)
+    assert np.isnan(obtido[:, 1]).all()
+    np.testing.assert_allclose(obtido, esperado, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("kernel", KERNELS, ids=lambda k: k.__name__)
+def test_kernel_entrada_vazia(kernel):
+    obtido = kernel(np.array([], dtype=np.int64), np.empty((0, 2)), pd.Timedelta("8h").value, 6)
+    assert obtido.shape == (0, 2)
+
+
+def test_media_movel_vetor_e_vazio():
+    df = _dados_irregulares(n=500, colunas=1)
+    esperado = df["p0"].rolling("1h", min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(media_movel(epoch_ns(df.index), df["p0"].to_numpy(), pd.Timedelta("1h").value),
+                               esperado, rtol=1e-9, atol=1e-9)
+
+    assert media_movel(np.array([], dtype=np.int64), np.array([]), pd.Timedelta("1h").value).shape == (0,)
+    horas, medias = medias_horarias(np.array([], dtype=np.int64), np.empty((0, 2)))
+    assert len(horas) == 0 and medias.shape == (0, 2)
+
+
+def test_base_horaria_igual_a_referencia_pandas():
+    # ~50 amostras válidas por hora: parte das horas fica abaixo de AMOSTRAS_MINIMAS_HORA
+    df = _dados_irregulares(n=6000, colunas=len(JANELAS), fracao=0.88, nulos=0.05)
+    df.columns = list(JANELAS)
+
+    # Referência: média de cada hora com o mínimo de amostras, depois rolling das médias horárias
+    horas = df.resample("1h")
+    horarias = horas.mean().where(horas.count() >= AMOSTRAS_MINIMAS_HORA)[horas.size() > 0]
+    esperado = pd.concat([horarias[[p]].rolling(janela, min_periods=minimo).mean()
+                          for p, (janela, minimo) in JANELAS.items()], axis=1)
+
+    obtido = medias_moveis(df, base="horaria")
+    assert obtido.notna().to_numpy().mean() > 0.5
+    assert obtido.index.equals(esperado.index)
+    np.testing.assert_allclose(obtido.to_numpy(), esperado.to_numpy(), rtol=1e-9, atol=1e-9)
+
+
+def test_base_amostras_igual_ao_rolling_do_pandas():
+    df = _dados_irregulares(n=3000, colunas=len(JANELAS))
+    df.columns = list(JANELAS)
+    esperado = pd.concat([df[[p]].rolling(janela, min_periods=minimo).mean()
+                          for p, (janela, minimo) in JANELAS.items()], axis=1)
+
+    obtido = medias_moveis(df, base="amostras")
+    np.testing.assert_allclose(obtido.to_numpy(), esperado.to_numpy(), rtol=1e-9, atol=1e-9)